@@ -8,7 +8,7 @@ import streamlit as st
 import pandas as pd
 from strategy import run_backtest
 from strategy.visualization import plot_heatmap, plot_trades
-import matplotlib.pyplot as plt
+from strategy.rolling import rolling_metrics
 
 # Page configuration
 st.set_page_config(
@@ -92,6 +92,15 @@ grid_search_step = st.sidebar.slider(
     help="Step size for parameter optimization (smaller = more thorough but slower)"
 )
 
+rolling_window = st.sidebar.number_input(
+    "Rolling Window (bars)",
+    value=30,
+    min_value=2,
+    max_value=1000,
+    step=1,
+    help="Window for the rolling Sharpe, volatility, max drawdown and hit rate"
+)
+
 # Run button
 run_button = st.sidebar.button("Run Backtest", type="primary", use_container_width=True)
 
@@ -193,7 +202,9 @@ if run_button:
                 metrics_df.columns = ['Value']
                 st.dataframe(metrics_df, use_container_width=True)
             
-            # Visualizations
+            # Visualizations (matplotlib is only loaded once there is something to plot)
+            import matplotlib.pyplot as plt
+
             st.header("Visualizations")
             
             # Heatmap
@@ -204,9 +215,19 @@ if run_button:
             
             # Trades and Equity Curve
             st.subheader("Price, Indicators & Equity Curve")
-            fig_trades = plot_trades(results['strategy_df'], results['trades_df'], show_plot=False)
+            fig_trades = plot_trades(
+                results['strategy_df'], results['trades_df'],
+                show_plot=False, rolling_window=int(rolling_window)
+            )
             st.pyplot(fig_trades)
             plt.close(fig_trades)
+
+            # Rolling metrics
+            with st.expander(f"Rolling Metrics ({int(rolling_window)} bars)"):
+                rolling_df = rolling_metrics(results['strategy_df']['Equity'], int(rolling_window))
+                st.line_chart(rolling_df[['Rolling Sharpe']])
+                st.line_chart(rolling_df[['Rolling Volatility', 'Rolling Max Drawdown', 'Rolling Hit Rate']])
+                st.dataframe(rolling_df.dropna(how='all'), use_container_width=True)
             
             # Trade log table
             if not results['trades_df'].empty:
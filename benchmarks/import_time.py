@@ -0,0 +1,98 @@
+"""
+Import-Time Benchmark
+=====================
+Checks that the core engine imports fast and without heavy dependencies.
+
+Each import is timed in a fresh interpreter. The budget applies to the time
+spent on top of importing numpy and pandas, which every worker needs anyway,
+so the check is stable across fast and slow machines.
+
+Usage:
+    python benchmarks/import_time.py --budget-ms 50 --runs 7
+
+Exits with status 1 if an import exceeds the budget or pulls in one of the
+heavy modules (yfinance, pandas_datareader, matplotlib, seaborn).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASELINE = "import numpy, pandas"
+
+# Statements a headless worker runs before it can call run_strategy
+CHECKS = {
+    "import strategy": "import strategy",
+    "core engine": (
+        "from strategy import run_strategy, calculate_metrics, perform_grid_search, run_portfolio"
+    ),
+    "run_backtest (lazy)": "from strategy import run_backtest",
+    "plotting module": "from strategy.visualization import plot_heatmap, plot_trades",
+    "batch runner": "import strategy.batch",
+    "timeframe engine": "from strategy.timeframes import TimeframeStore",
+}
+
+HEAVY_MODULES = ["yfinance", "pandas_datareader", "matplotlib", "seaborn"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "ms": elapsed * 1e3,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def time_import(statement: str, runs: int) -> dict:
+    """Fastest wall time (ms) of `statement` over fresh interpreters."""
+    samples, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        heavy.update(result["heavy"])
+    return {"ms": min(samples), "heavy": sorted(heavy)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Enforce an import-time budget for the strategy package.")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="Allowed import time on top of numpy + pandas (default: 50)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    args = parser.parse_args(argv)
+
+    baseline = time_import(BASELINE, args.runs)["ms"]
+    print(f"{'numpy + pandas baseline':<26} {baseline:8.1f} ms")
+
+    failures = []
+    for label, statement in CHECKS.items():
+        result = time_import(BASELINE + "; " + statement, args.runs)
+        overhead = result["ms"] - baseline
+        status = "ok"
+        if overhead > args.budget_ms:
+            status = "OVER BUDGET"
+            failures.append(label)
+        if result["heavy"]:
+            status = f"LOADS {', '.join(result['heavy'])}"
+            failures.append(label)
+        print(f"{label:<26} {result['ms']:8.1f} ms  (+{overhead:6.1f} ms)  {status}")
+
+    if failures:
+        print(f"\nFailed: {', '.join(failures)} (budget {args.budget_ms:.0f} ms over baseline)")
+        return 1
+    print(f"\nAll imports within {args.budget_ms:.0f} ms of the numpy + pandas baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
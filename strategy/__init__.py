@@ -0,0 +1,48 @@
+"""
+Trading Strategy Package
+========================
+Exponential smoothing strategy: data, engine, metrics, optimization and plots.
+
+The core engine (run_strategy, calculate_metrics, perform_grid_search,
+run_portfolio) only needs numpy and pandas and is imported eagerly. The
+network fetchers, plotting functions and run_backtest are resolved on first
+attribute access, so `import strategy` stays fast for headless workers.
+"""
+
+import importlib
+
+from strategy.metrics import calculate_metrics
+from strategy.strategy import run_strategy
+from strategy.optimization import perform_grid_search
+from strategy.portfolio import run_portfolio
+
+
+_LAZY_ATTRS = {
+    'run_backtest': 'strategy.backtest',
+    'get_price_data': 'strategy.data',
+    'get_macro_data': 'strategy.data',
+    'plot_heatmap': 'strategy.visualization',
+    'plot_trades': 'strategy.visualization',
+    'TimeframeStore': 'strategy.timeframes',
+}
+
+__all__ = [
+    'calculate_metrics',
+    'run_strategy',
+    'perform_grid_search',
+    'run_portfolio',
+    *_LAZY_ATTRS,
+]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'strategy' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
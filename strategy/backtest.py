@@ -0,0 +1,99 @@
+"""
+Backtest Module
+===============
+The run_backtest convenience wrapper: download, optimize, run and plot.
+"""
+
+from typing import Any, Dict
+
+from strategy.data import get_price_data, get_macro_data
+from strategy.optimization import perform_grid_search
+from strategy.strategy import run_strategy
+
+
+def run_backtest(
+    ticker: str = "EURUSD=X",
+    start_date: str = "2024-01-01",
+    end_date: str = "2025-01-01",
+    threshold: float = 0.00015,
+    deceleration_rate: float = 0.0005,
+    use_macro: bool = False,
+    initial_capital: float = 10000,
+    grid_search_step: float = 0.05,
+    plot_results: bool = True,
+    pruning=None
+) -> Dict[str, Any]:
+    """
+    Runs a full backtest: fetches data, grid-searches alpha/beta and runs
+    the strategy with the best parameters.
+
+    Parameters:
+    -----------
+    ticker : str
+        Ticker symbol (e.g., "EURUSD=X" for FX pairs)
+    start_date : str
+        Start date in "YYYY-MM-DD" format
+    end_date : str
+        End date in "YYYY-MM-DD" format
+    threshold : float
+        Crossover threshold for entry signals
+    deceleration_rate : float
+        Deceleration rate for exit signals
+    use_macro : bool
+        Whether to filter entries with macroeconomic variables
+    initial_capital : float
+        Starting capital
+    grid_search_step : float
+        Step size for parameter grid search
+    plot_results : bool
+        Whether to show the heatmap and trade plots
+    pruning : PruningPolicy, optional
+        Early-abort rules for the grid search (see strategy.pruning)
+
+    Returns:
+    --------
+    Dict[str, Any]
+        Keys: 'metrics', 'best_params', 'heatmap_data', 'strategy_df',
+        'trades_df'
+    """
+    print(f"Fetching price data for {ticker} ({start_date} to {end_date})...")
+    data = get_price_data(ticker, start_date, end_date)
+    if data.empty:
+        raise ValueError(f"No price data returned for {ticker}")
+
+    macro_df = get_macro_data(start_date, end_date) if use_macro else None
+
+    heatmap_data, best_params = perform_grid_search(
+        data, threshold, deceleration_rate,
+        step=grid_search_step,
+        macro_df=macro_df,
+        pruning=pruning
+    )
+    if not best_params:
+        raise ValueError("All grid search cells were pruned; relax the pruning policy")
+    print(f"Best parameters: alpha={best_params['alpha']:.2f}, beta={best_params['beta']:.2f}")
+
+    metrics, strategy_df, trades_df = run_strategy(
+        data, best_params['alpha'], best_params['beta'],
+        threshold=threshold,
+        decel_rate=deceleration_rate,
+        initial_capital=initial_capital,
+        macro_df=macro_df
+    )
+
+    for name, value in metrics.items():
+        print(f"  {name}: {value:.4f}")
+
+    if plot_results:
+        from strategy.visualization import plot_heatmap, plot_trades
+
+        plot_heatmap(heatmap_data)
+        plot_trades(strategy_df, trades_df)
+
+    return {
+        'metrics': metrics,
+        'best_params': best_params,
+        'heatmap_data': heatmap_data,
+        'strategy_df': strategy_df,
+        'trades_df': trades_df,
+    }
@@ -0,0 +1,463 @@
+"""
+Batch Job Runner
+================
+Headless runner for large backtest campaigns.
+
+A job spec (JSON) is expanded into tasks, which run on a bounded process
+pool. Results are written in Parquet part files as batches finish, so a
+crashed or interrupted campaign resumes where it stopped.
+
+Usage:
+    python -m strategy.batch campaign.json --workers 8
+
+Job spec:
+    {
+        "output": "runs/campaign",
+        "interval": "1d",
+        "cache_dir": ".price_cache",
+        "defaults": {"initial_capital": 10000, "grid_search_step": 0.05},
+        "grid": {
+            "ticker": ["EURUSD=X", "GBPUSD=X"],
+            "date_range": [["2023-01-01", "2024-01-01"], ["2024-01-01", "2025-01-01"]],
+            "threshold": [0.00015, 0.0015],
+            "decel_rate": [0.0005, 0.005],
+            "use_macro": [false, true],
+            "timeframe": ["1d", "1wk"]
+        },
+        "tasks": []
+    }
+
+Every combination of the "grid" values becomes one task, on top of any
+explicit "tasks". A task with "alpha" and "beta" runs those parameters
+directly; otherwise it grid-searches them first, like run_backtest.
+A task's optional "timeframe" is derived from the bars downloaded at
+"interval", so sweeping several timeframes costs one load per ticker.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from strategy.cache import DEFAULT_CACHE_DIR
+from strategy.data import get_price_data, get_macro_data
+from strategy.metrics import METRIC_NAMES
+from strategy.optimization import perform_grid_search
+from strategy.strategy import run_strategy
+from strategy.timeframes import TimeframeStore
+
+
+TASK_DEFAULTS = {
+    'threshold': 0.00015,
+    'decel_rate': 0.0005,
+    'use_macro': False,
+    'initial_capital': 10000,
+    'grid_search_step': 0.05,
+}
+
+
+def task_id(task: Dict) -> str:
+    """Stable identifier of a task, so re-expanding a spec finds finished work."""
+    payload = json.dumps(task, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def expand_spec(spec: Dict) -> List[Dict]:
+    """
+    Expands a job spec into a list of task dicts.
+
+    Each task has 'task_id', 'ticker', 'start', 'end', 'threshold',
+    'decel_rate', 'use_macro', 'initial_capital', 'grid_search_step' and
+    optionally 'alpha', 'beta' and 'timeframe'.
+    """
+    defaults = {**TASK_DEFAULTS, **spec.get('defaults', {})}
+    tasks = [dict(t) for t in spec.get('tasks', [])]
+
+    grid = dict(spec.get('grid', {}))
+    if grid:
+        if 'date_range' in grid:
+            grid['date_range'] = [tuple(r) for r in grid['date_range']]
+        keys = list(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            tasks.append(dict(zip(keys, values)))
+
+    expanded = []
+    seen = set()
+    for task in tasks:
+        task = {**defaults, **task}
+        if 'date_range' in task:
+            task['start'], task['end'] = task.pop('date_range')
+        missing = [k for k in ('ticker', 'start', 'end') if k not in task]
+        if missing:
+            raise ValueError(f"Task {task} is missing {', '.join(missing)}")
+        task['task_id'] = task_id(task)
+        if task['task_id'] not in seen:
+            seen.add(task['task_id'])
+            expanded.append(task)
+    return expanded
+
+
+# Per-process memo of loaded data, so tasks that share a ticker and date
+# range download (or read from the cache) only once per worker
+_PRICE_MEMO = {}
+_MACRO_MEMO = {}
+
+
+def _load_prices(
+    ticker: str,
+    start: str,
+    end: str,
+    interval: str,
+    cache_dir: Optional[str],
+    timeframe: Optional[str] = None
+) -> pd.DataFrame:
+    key = (ticker, start, end, interval)
+    if key not in _PRICE_MEMO:
+        bars = get_price_data(ticker, start, end, interval=interval, cache_dir=cache_dir, ohlc=True)
+        _PRICE_MEMO[key] = TimeframeStore(bars, base_interval=interval)
+    return _PRICE_MEMO[key].get(timeframe)
+
+
+def _load_macro(start: str, end: str) -> pd.DataFrame:
+    key = (start, end)
+    if key not in _MACRO_MEMO:
+        _MACRO_MEMO[key] = get_macro_data(start, end)
+    return _MACRO_MEMO[key]
+
+
+def prefetch_prices(tasks: List[Dict], interval: str, cache_dir: str) -> Dict[str, str]:
+    """
+    Downloads every ticker the tasks need into the price cache, concurrently,
+    so workers read it instead of downloading one ticker at a time.
+
+    Returns:
+    --------
+    Dict[str, str]
+        {ticker: error} for tickers that could not be fetched; their tasks
+        then fail (and are recorded) on their own
+    """
+    from strategy.fetch import DataFetcher
+
+    ranges = {}
+    for task in tasks:
+        ranges.setdefault((task['start'], task['end']), set()).add(task['ticker'])
+
+    fetcher = DataFetcher()
+    errors = {}
+    for (start, end), tickers in ranges.items():
+        result = fetcher.fetch(start, end, tickers=sorted(tickers), interval=interval, cache_dir=cache_dir)
+        errors.update({ticker: failure.error for ticker, failure in result.failures.items()})
+    return errors
+
+
+def run_task(task: Dict, interval: str = "1d", cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> Tuple[Dict, pd.Series]:
+    """
+    Runs one backtest task.
+
+    Returns:
+    --------
+    Tuple[Dict, pd.Series]
+        (result row with task parameters and metrics, equity curve)
+    """
+    data = _load_prices(task['ticker'], task['start'], task['end'], interval, cache_dir, task.get('timeframe'))
+    if data.empty:
+        raise ValueError(f"No price data for {task['ticker']} {task['start']}..{task['end']}")
+    macro_df = _load_macro(task['start'], task['end']) if task['use_macro'] else None
+
+    if 'alpha' in task and 'beta' in task:
+        alpha, beta = task['alpha'], task['beta']
+    else:
+        _, best_params = perform_grid_search(
+            data, task['threshold'], task['decel_rate'],
+            step=task['grid_search_step'], macro_df=macro_df
+        )
+        alpha, beta = best_params['alpha'], best_params['beta']
+
+    metrics, strategy_df, _ = run_strategy(
+        data, alpha, beta,
+        threshold=task['threshold'],
+        decel_rate=task['decel_rate'],
+        initial_capital=task['initial_capital'],
+        macro_df=macro_df
+    )
+
+    row = {**task, 'alpha': float(alpha), 'beta': float(beta)}
+    row.update({k: float(v) for k, v in metrics.items()})
+    return row, strategy_df['Equity']
+
+
+def run_batch(tasks: List[Dict], interval: str, cache_dir: Optional[str], quiet: bool = True) -> Dict:
+    """
+    Runs a batch of tasks inside one worker. Failures are recorded per task
+    instead of aborting the batch.
+    """
+    rows, equity, errors = [], [], []
+    compute_s = 0.0
+    sink = io.StringIO() if quiet else None
+
+    for task in tasks:
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+                row, curve = run_task(task, interval=interval, cache_dir=cache_dir)
+        except Exception as e:
+            errors.append({'task_id': task['task_id'], 'error': f"{type(e).__name__}: {e}"})
+            continue
+        finally:
+            elapsed = time.perf_counter() - started
+            compute_s += elapsed
+            if sink is not None:
+                sink.seek(0)
+                sink.truncate()
+
+        row['compute_s'] = elapsed
+        rows.append(row)
+        equity.append(pd.DataFrame({
+            'task_id': task['task_id'],
+            'Date': curve.index,
+            'Equity': curve.to_numpy(),
+        }))
+
+    return {'rows': rows, 'equity': equity, 'errors': errors, 'compute_s': compute_s}
+
+
+def _result_columns(tasks: List[Dict]) -> List[str]:
+    """
+    Columns of every metrics part: the union of the task keys, then the
+    fitted parameters, the metrics and the task's compute time.
+    """
+    keys = dict.fromkeys(k for task in tasks for k in task)
+    keys.update(dict.fromkeys(['alpha', 'beta'] + METRIC_NAMES + ['compute_s']))
+    return list(keys)
+
+
+def _write_part(df: pd.DataFrame, directory: str, part: int):
+    """Writes one Parquet part atomically, so a crash never leaves a torn file."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{part:05d}.parquet")
+    # Hidden temp name, so dataset readers never pick up a half-written part
+    tmp = os.path.join(directory, f".part-{part:05d}.parquet.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _part_ids(output: str, sub: str) -> set:
+    """Task ids written to the metrics or errors parts (the resume checkpoint)."""
+    directory = os.path.join(output, sub)
+    if not os.path.isdir(directory):
+        return set()
+    ids = set()
+    for name in os.listdir(directory):
+        if name.endswith('.parquet'):
+            ids.update(pd.read_parquet(os.path.join(directory, name), columns=['task_id'])['task_id'])
+    return ids
+
+
+def _next_part(output: str) -> int:
+    parts = [-1]
+    for sub in ('metrics', 'equity', 'errors'):
+        directory = os.path.join(output, sub)
+        if os.path.isdir(directory):
+            parts += [int(n[5:10]) for n in os.listdir(directory) if n.endswith('.parquet')]
+    return max(parts) + 1
+
+
+def run_campaign(
+    spec: Dict,
+    workers: Optional[int] = None,
+    batch_size: int = 16,
+    retry_failed: bool = False,
+    quiet: bool = True
+) -> Dict[str, float]:
+    """
+    Runs every task of a job spec that has not finished yet.
+
+    Output layout under spec['output']:
+        metrics/part-*.parquet   one row per task (parameters + metrics)
+        equity/part-*.parquet    long format: task_id, Date, Equity
+        errors/part-*.parquet    task_id, error for tasks that raised
+        summary.json             throughput and overhead of the last run
+
+    Parameters:
+    -----------
+    spec : dict
+        Parsed job spec
+    workers : int, optional
+        Worker processes (default: os.cpu_count())
+    batch_size : int
+        Tasks sent to a worker per round trip. Larger batches amortise
+        inter-process overhead; smaller ones checkpoint more often.
+    retry_failed : bool
+        Re-run tasks that previously raised
+    quiet : bool
+        Silence the strategy's progress prints inside workers
+
+    Returns:
+    --------
+    Dict[str, float]
+        Run summary (tasks, wall time, compute time, per-task overhead)
+    """
+    output = spec.get('output', 'runs/campaign')
+    interval = spec.get('interval', '1d')
+    cache_dir = spec.get('cache_dir', DEFAULT_CACHE_DIR)
+    workers = workers or os.cpu_count() or 1
+
+    tasks = expand_spec(spec)
+    columns = _result_columns(tasks)
+    # Task keys holding strings: written as null strings (not doubles) in parts without them
+    text_columns = {k for task in tasks for k, v in task.items() if isinstance(v, str)}
+    succeeded_ids = _part_ids(output, 'metrics')
+    failed_ids = _part_ids(output, 'errors')
+    done = succeeded_ids | failed_ids
+    if retry_failed:
+        # A task that failed and later succeeded stays done
+        done -= failed_ids - succeeded_ids
+    pending = [t for t in tasks if t['task_id'] not in done]
+
+    print(f"{len(tasks)} tasks in spec, {len(tasks) - len(pending)} already done, "
+          f"{len(pending)} to run on {workers} workers")
+
+    if pending and cache_dir is not None:
+        prefetch_prices(pending, interval, cache_dir)
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    part = _next_part(output)
+    completed = failed = 0
+    compute_s = write_s = 0.0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = iter(batches)
+        in_flight = set()
+
+        def submit_next():
+            batch = next(queue, None)
+            if batch is not None:
+                in_flight.add(pool.submit(run_batch, batch, interval, cache_dir, quiet))
+
+        # Keep at most two batches per worker in flight to bound memory
+        for _ in range(2 * workers):
+            submit_next()
+
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                submit_next()
+
+                write_started = time.perf_counter()
+                if result['rows']:
+                    _write_part(pd.concat(result['equity'], ignore_index=True),
+                                os.path.join(output, 'equity'), part)
+                    # Metrics are written last: they are the resume checkpoint. Every
+                    # part gets the same columns, as dataset readers take the schema
+                    # from a single file
+                    rows = pd.DataFrame(result['rows']).reindex(columns=columns)
+                    for col in columns:
+                        if col in text_columns and all(col not in r for r in result['rows']):
+                            rows[col] = pd.Series(pd.NA, index=rows.index, dtype='string')
+                    _write_part(rows, os.path.join(output, 'metrics'), part)
+                if result['errors']:
+                    _write_part(pd.DataFrame(result['errors']),
+                                os.path.join(output, 'errors'), part)
+                part += 1
+                write_s += time.perf_counter() - write_started
+
+                completed += len(result['rows'])
+                failed += len(result['errors'])
+                compute_s += result['compute_s']
+                print(f"  {completed + failed}/{len(pending)} tasks finished ({failed} failed)")
+
+    wall_s = time.perf_counter() - started
+    n = max(1, completed + failed)
+    summary = {
+        'tasks_run': completed + failed,
+        'tasks_failed': failed,
+        'workers': workers,
+        'wall_s': wall_s,
+        'compute_s': compute_s,
+        'write_s': write_s,
+        'tasks_per_s': (completed + failed) / wall_s if wall_s > 0 else 0.0,
+        'compute_per_task_ms': compute_s / n * 1e3,
+        # Worker time not spent inside tasks: pool start-up, IPC, pickling
+        # and the parent writing parts, spread over the tasks that ran
+        'overhead_per_task_ms': max(0.0, wall_s * workers - compute_s) / n * 1e3,
+    }
+
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def _read_parts(directory: str) -> pd.DataFrame:
+    """Concatenates the part files of one output directory, with each row's part number."""
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.parquet'):
+            frames.append(pd.read_parquet(os.path.join(directory, name)).assign(part=int(name[5:10])))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['task_id', 'part'])
+
+
+def load_results(output: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Reads a campaign's metrics and equity curves back.
+
+    Returns:
+    --------
+    Tuple[pd.DataFrame, pd.DataFrame]
+        (metrics_df, equity_df)
+    """
+    # Parts are read one by one, so runs with different specs (and column
+    # sets) in the same output directory still load together
+    metrics_df = _read_parts(os.path.join(output, 'metrics'))
+    equity_df = _read_parts(os.path.join(output, 'equity'))
+
+    # A crash between a batch's equity and metrics writes leaves equity
+    # without metrics, and the task runs again on resume: keep one metrics
+    # row per task and only the equity curve written with it
+    metrics_df = metrics_df.drop_duplicates('task_id', keep='last')
+    latest = metrics_df.set_index('task_id')['part']
+    equity_df = equity_df[equity_df['part'].to_numpy() == equity_df['task_id'].map(latest).to_numpy()]
+    return (metrics_df.drop(columns='part').reset_index(drop=True),
+            equity_df.drop(columns='part').reset_index(drop=True))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run a backtest campaign from a job spec.")
+    parser.add_argument("spec", help="Path to the JSON job spec")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--output", default=None, help="Override the spec's output directory")
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Show the strategy's progress output")
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    if args.output:
+        spec['output'] = args.output
+
+    summary = run_campaign(
+        spec,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        retry_failed=args.retry_failed,
+        quiet=not args.verbose
+    )
+
+    print("\nCampaign summary:")
+    for key, value in summary.items():
+        print(f"  {key:<20} {value:,.3f}" if isinstance(value, float) else f"  {key:<20} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Price Cache Module
+import os
+import pandas as pd
+from typing import List, Optional, Tuple
+
+
+DEFAULT_CACHE_DIR = ".price_cache"
+
+
+def cache_path(ticker: str, interval: str = "1d", cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """
+    Returns the file used to cache one ticker at one interval.
+    """
+    safe_ticker = "".join(c if c.isalnum() else "_" for c in ticker)
+    return os.path.join(cache_dir, f"{safe_ticker}_{interval}.pkl")
+
+
+def _to_index_tz(ts, index: pd.Index) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    tz = getattr(index, "tz", None)
+    if tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(tz)
+    if tz is None and ts.tzinfo is not None:
+        return ts.tz_convert(None)
+    return ts
+
+
+def slice_range(df: pd.DataFrame, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """
+    Returns the rows in [start, end), matching yfinance's exclusive end date.
+    """
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df.index >= _to_index_tz(start, df.index)
+    if end is not None:
+        mask &= df.index < _to_index_tz(end, df.index)
+    return df[mask.to_numpy()]
+
+
+def load_prices(
+    ticker: str,
+    interval: str = "1d",
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Loads cached price data, or None if the ticker has not been cached.
+
+    Parameters:
+    -----------
+    ticker : str
+        Ticker symbol (e.g., "EURUSD=X")
+    interval : str
+        Data interval the cache was stored at
+    cache_dir : str
+        Directory holding the cache files
+    start, end : str, optional
+        Restrict the result to [start, end)
+
+    Returns:
+    --------
+    pd.DataFrame or None
+        Cached data; attrs['ranges'] lists the [start, end) date ranges that
+        have been downloaded into the cache
+    """
+    path = cache_path(ticker, interval, cache_dir)
+    if not os.path.exists(path):
+        return None
+    df = pd.read_pickle(path)
+    if start is None and end is None:
+        return df
+    sliced = slice_range(df, start, end)
+    sliced.attrs = dict(df.attrs)
+    return sliced
+
+
+def _ranges(attrs: dict) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Downloaded [start, end) ranges recorded in a cached frame's attrs."""
+    return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in attrs.get('ranges', [])]
+
+
+def _merge_ranges(ranges: List[Tuple[pd.Timestamp, pd.Timestamp]]) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Sorts ranges and joins the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def covers(df: Optional[pd.DataFrame], start: str, end: str) -> bool:
+    """
+    Whether a cached frame was downloaded over the whole of [start, end).
+    """
+    if df is None:
+        return False
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    # Ranges are merged on save, so one of them has to hold the request
+    return any(s <= start and e >= end for s, e in _ranges(df.attrs))
+
+
+def save_prices(
+    df: pd.DataFrame,
+    ticker: str,
+    start: str,
+    end: str,
+    interval: str = "1d",
+    cache_dir: str = DEFAULT_CACHE_DIR
+) -> pd.DataFrame:
+    """
+    Merges freshly downloaded data for [start, end) into the cache.
+
+    Returns:
+    --------
+    pd.DataFrame
+        The full cached frame after the merge
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cached = load_prices(ticker, interval, cache_dir)
+    ranges = [(pd.Timestamp(start), pd.Timestamp(end))]
+
+    if cached is not None and not cached.empty:
+        merged = df.combine_first(cached).sort_index()
+        ranges += _ranges(cached.attrs)
+    else:
+        merged = df.sort_index()
+
+    merged.attrs = {
+        'ticker': ticker,
+        'interval': interval,
+        'ranges': [[s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")] for s, e in _merge_ranges(ranges)],
+    }
+    merged.to_pickle(cache_path(ticker, interval, cache_dir))
+    return merged
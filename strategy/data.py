@@ -1,11 +1,24 @@
 # Data Fetching Module
-import yfinance as yf
+# yfinance and the concurrent fetch layer are imported inside the fetchers,
+# so code that only runs the engine on cached data never pays for them.
 import pandas as pd
-import pandas_datareader.data as web
 import numpy as np
+from typing import Dict, List, Optional
 
+from strategy.cache import load_prices, save_prices, covers, slice_range
 
-def get_price_data(ticker: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+
+OHLC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def get_price_data(
+    ticker: str,
+    start: str,
+    end: str,
+    interval: str = "1d",
+    cache_dir: Optional[str] = None,
+    ohlc: bool = False
+) -> pd.DataFrame:
     """
     Downloads historical price data from yfinance.
     
@@ -19,38 +32,140 @@ def get_price_data(ticker: str, start: str, end: str, interval: str = "1d") -> p
         End date in "YYYY-MM-DD" format
     interval : str
         Data interval (default: "1d" for daily)
+    cache_dir : str, optional
+        If given, serve the request from the local price cache when it covers
+        [start, end) and store newly downloaded data there otherwise
+    ohlc : bool
+        Return the full bars (Open/High/Low/Close/Volume) instead of only
+        'Close'. Downloaded data is always cached as full bars.
     
     Returns:
     --------
     pd.DataFrame
-        DataFrame with 'Close' column and DateTimeIndex
+        DataFrame with 'Close' column (or OHLC columns) and DateTimeIndex
     """
+    if cache_dir is not None:
+        cached = load_prices(ticker, interval, cache_dir)
+        if covers(cached, start, end):
+            cached = slice_range(cached, start, end)
+            return cached if ohlc else cached[['Close']]
+
+    import yfinance as yf
+
     df = yf.download(ticker, start=start, end=end, interval=interval, progress=False)
 
     # Handle multi-index columns if yfinance returns them
     if isinstance(df.columns, pd.MultiIndex):
         try:
             if 'Close' in df.columns.levels[0]:
-                df = df['Close']
+                df.columns = df.columns.get_level_values(0)
             else:
                 df = df.iloc[:, 0].to_frame(name='Close')
         except:
             df = df.iloc[:, 0].to_frame(name='Close')
-    else:
-        if 'Close' in df.columns:
-            df = df[['Close']]
-        else:
-            df = df.iloc[:, 0].to_frame(name='Close')
+    if 'Close' not in df.columns:
+        df = df.iloc[:, 0].to_frame(name='Close')
+
+    # Keep the full bars so higher timeframes can be derived from them
+    df = df[[c for c in OHLC_COLUMNS if c in df.columns]]
+    df = df.dropna(subset=['Close'])
+
+    if cache_dir is not None and not df.empty:
+        save_prices(df, ticker, start, end, interval=interval, cache_dir=cache_dir)
+    return df if ohlc else df[['Close']]
+
+
+def get_prices(
+    tickers: List[str],
+    start: str,
+    end: str,
+    interval: str = "1d",
+    cache_dir: Optional[str] = None,
+    ohlc: bool = False,
+    fetcher=None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Downloads many tickers concurrently (see strategy.fetch).
+
+    Parameters:
+    -----------
+    tickers : list of str
+        Ticker symbols
+    start, end, interval, cache_dir, ohlc
+        As in get_price_data
+    fetcher : DataFetcher, optional
+        Fetcher to use (connection limit, timeouts, retries, transport)
+
+    Returns:
+    --------
+    Dict[str, pd.DataFrame]
+        {ticker: price data}
+
+    Raises:
+    -------
+    FetchError
+        If any ticker could not be loaded, listing each failure
+    """
+    from strategy.fetch import DataFetcher
+
+    fetcher = fetcher or DataFetcher()
+    prices = fetcher.prices(tickers, start, end, interval=interval, cache_dir=cache_dir)
+    return {ticker: df if ohlc else df[['Close']] for ticker, df in prices.items()}
+
+
+# FRED series behind the macro signal
+MACRO_SERIES = {
+    'US_GDP': 'GDP',  # US GDP (Billions $)
+    'EU_GDP': 'CLVMNACSCAB1GQEU28',  # Euro Area GDP (Real, Index)
+    'US_CA': 'IEABC',  # US Current Account (Billions $)
+    'EU_CA_Pct': 'EA19B6BLTT02STSAQ',  # Euro Area Current Account (% of GDP)
+}
+
+
+def compute_macro_signal(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the macro signal from the MACRO_SERIES columns.
+
+    Parameters:
+    -----------
+    data : pd.DataFrame
+        Columns 'US_GDP', 'EU_GDP', 'US_CA' and 'EU_CA_Pct' on their FRED dates
+
+    Returns:
+    --------
+    pd.DataFrame
+        Daily DataFrame with 'Macro_Signal' column (1 = Bullish EUR, -1 = Bearish EUR)
+    """
+    data = data.resample('D').ffill()
+
+    # Normalize data
+    # GDP Growth (Year over Year using 252 trading days)
+    data['US_Growth'] = data['US_GDP'].pct_change(252)
+    data['EU_Growth'] = data['EU_GDP'].pct_change(252)
+
+    # Current Account (Convert US to % of GDP to match EU)
+    data['US_CA_Pct'] = (data['US_CA'] / data['US_GDP']) * 100
+
+    # Calculate scores
+    data['Growth_Diff'] = data['EU_Growth'] - data['US_Growth']
+    data['Trade_Diff'] = data['EU_CA_Pct'] - data['US_CA_Pct']
+
+    # Final signal (weighted sum)
+    data['Total_Score'] = data['Growth_Diff'] + data['Trade_Diff']
 
-    # Ensure column is named 'Close'
-    df.columns = ['Close'] if len(df.columns) == 1 else df.columns
-    return df.dropna()
+    # Binary signal: 1 = Bullish EUR, -1 = Bearish EUR (Long USD)
+    data['Macro_Signal'] = np.where(data['Total_Score'] > 0, 1, -1)
+    return data[['Macro_Signal']]
 
 
-def get_macro_data(start_date: str, end_date: str) -> pd.DataFrame:
+def get_macro_data(start_date: str, end_date: str, fetcher=None) -> pd.DataFrame:
     """
     Fetches GDP and Current Account data for US and Euro Area from FRED.
     Creates a macro signal based on growth and trade differentials.
+
+    The four series are requested concurrently. A failed series raises
+    FetchError rather than falling back to a neutral signal, so a fetch
+    problem can never silently change backtest results.
     
     Parameters:
     -----------
@@ -58,52 +173,27 @@ def get_macro_data(start_date: str, end_date: str) -> pd.DataFrame:
         Start date in "YYYY-MM-DD" format
     end_date : str
         End date in "YYYY-MM-DD" format
+    fetcher : DataFetcher, optional
+        Fetcher to use (connection limit, timeouts, retries, transport)
     
     Returns:
     --------
     pd.DataFrame
         DataFrame with 'Macro_Signal' column (1 = Bullish EUR, -1 = Bearish EUR)
+
+    Raises:
+    -------
+    FetchError
+        If any FRED series could not be loaded
     """
     print("Fetching Macro Data (GDP + Current Account)...")
+    from strategy.fetch import DataFetcher
 
-    tickers = {
-        'US_GDP': 'GDP',  # US GDP (Billions $)
-        'EU_GDP': 'CLVMNACSCAB1GQEU28',  # Euro Area GDP (Real, Index)
-        'US_CA': 'IEABC',  # US Current Account (Billions $)
-        'EU_CA_Pct': 'EA19B6BLTT02STSAQ',  # Euro Area Current Account (% of GDP)
-    }
-
-    try:
-        data = web.DataReader(list(tickers.values()), 'fred', start_date, end_date)
-        data.columns = list(tickers.keys())
-        data = data.resample('D').ffill()
-
-        # Normalize data
-        # GDP Growth (Year over Year using 252 trading days)
-        data['US_Growth'] = data['US_GDP'].pct_change(252)
-        data['EU_Growth'] = data['EU_GDP'].pct_change(252)
-
-        # Current Account (Convert US to % of GDP to match EU)
-        data['US_CA_Pct'] = (data['US_CA'] / data['US_GDP']) * 100
-
-        # Calculate scores
-        data['Growth_Diff'] = data['EU_Growth'] - data['US_Growth']
-        data['Trade_Diff'] = data['EU_CA_Pct'] - data['US_CA_Pct']
-
-        # Final signal (weighted sum)
-        data['Total_Score'] = data['Growth_Diff'] + data['Trade_Diff']
-
-        # Binary signal: 1 = Bullish EUR, -1 = Bearish EUR (Long USD)
-        data['Macro_Signal'] = np.where(data['Total_Score'] > 0, 1, -1)
-
-        print("Macro Data fetched successfully.")
-        print(f"Signal Distribution:\n{data['Macro_Signal'].value_counts()}")
-
-        return data[['Macro_Signal']]
-
-    except Exception as e:
-        print(f"Error fetching macro data: {e}")
-        print("Using fallback signal (neutral: all 1s).")
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        return pd.DataFrame({'Macro_Signal': 1}, index=dates)
+    fetcher = fetcher or DataFetcher()
+    data = fetcher.series(list(MACRO_SERIES.values()), start_date, end_date)
+    data.columns = list(MACRO_SERIES.keys())
+    signal = compute_macro_signal(data)
 
+    print("Macro Data fetched successfully.")
+    print(f"Signal Distribution:\n{signal['Macro_Signal'].value_counts()}")
+    return signal
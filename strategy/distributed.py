@@ -0,0 +1,561 @@
+"""
+Distributed Sweep Module
+========================
+Coordinator/worker mode for grid searches too large for one machine.
+
+The coordinator splits the (ticker x threshold x decel_rate x alpha x beta)
+space into leases and hands them to workers over TCP. Workers load each
+ticker's prices once from the shared price cache, run run_strategy on every
+cell of a lease and stream metrics back in small batches. Each batch is
+acknowledged with the number of cells the lease still covers, which lets
+the coordinator:
+
+- re-lease the unfinished cells of a worker that disconnects or goes
+  silent for longer than `lease_timeout`, and
+- let idle workers steal the back half of the largest running lease once
+  nothing is pending (the owner stops at the new limit on its next ack).
+
+Results come back in the perform_grid_search shape: one (heatmap_data,
+best_params) pair per (ticker, threshold, decel_rate).
+
+Usage (one machine, four local workers):
+    python -m strategy.distributed sweep EURUSD=X GBPUSD=X --start 2020-01-01 \\
+        --end 2025-01-01 --thresholds 0.00015 0.0015 --decel-rates 0.0005 0.005 \\
+        --local-workers 4
+
+Usage (several machines):
+    coordinator$ python -m strategy.distributed sweep ... --port 6000 --authkey SECRET
+    worker$      python -m strategy.distributed worker coordinator-host:6000 --authkey SECRET
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from strategy.cache import DEFAULT_CACHE_DIR
+from strategy.strategy import run_strategy
+
+
+# Identifies one evaluation in results and progress messages
+_CELL_KEYS = ('ticker', 'alpha', 'beta', 'threshold', 'decel_rate')
+
+
+# ============================================================================
+# Worker
+# ============================================================================
+
+def _evaluate(data: pd.DataFrame, macro_df: Optional[pd.DataFrame], ticker: str, cell: Tuple) -> Dict:
+    alpha, beta, threshold, decel_rate = cell
+    row = {'ticker': ticker, 'alpha': alpha, 'beta': beta,
+           'threshold': threshold, 'decel_rate': decel_rate}
+    try:
+        metrics, _, _ = run_strategy(
+            data, alpha, beta,
+            threshold=threshold,
+            decel_rate=decel_rate,
+            macro_df=macro_df
+        )
+        row.update({k: float(v) for k, v in metrics.items()})
+    except Exception as e:
+        row['Sharpe Ratio'] = np.nan
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes, report_every: int = 8, quiet: bool = True):
+    """
+    Connects to a coordinator and evaluates leases until told to stop.
+
+    Parameters:
+    -----------
+    address : Tuple[str, int]
+        Coordinator (host, port)
+    authkey : bytes
+        Shared secret used to authenticate the connection
+    report_every : int
+        Cells evaluated between progress messages (also the heartbeat)
+    quiet : bool
+        Silence the data fetchers' progress prints
+    """
+    from strategy.data import get_price_data
+
+    conn = Client(tuple(address), authkey=authkey)
+    conn.send({'type': 'hello', 'pid': os.getpid(), 'host': os.uname().nodename})
+    config = conn.recv()
+
+    prices = {}
+    macro_df = config['macro_df']
+    redirect = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+
+    try:
+        while True:
+            conn.send({'type': 'request'})
+            msg = conn.recv()
+            if msg['type'] == 'done':
+                break
+            if msg['type'] == 'wait':
+                time.sleep(msg.get('retry_after', 0.05))
+                continue
+
+            ticker = msg['ticker']
+            with redirect:
+                if ticker not in prices:
+                    prices[ticker] = get_price_data(
+                        ticker, config['start'], config['end'],
+                        interval=config['interval'], cache_dir=config['cache_dir']
+                    )
+
+            cells = msg['cells']
+            limit = len(cells)
+            i = 0
+            while i < limit:
+                j = min(i + report_every, limit)
+                rows = [_evaluate(prices[ticker], macro_df, ticker, cell) for cell in cells[i:j]]
+                conn.send({'type': 'progress', 'lease_id': msg['lease_id'], 'next_index': j, 'rows': rows})
+                limit = conn.recv()['limit']
+                i = j
+    except (EOFError, ConnectionError):
+        pass
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# Coordinator
+# ============================================================================
+
+class _Lease:
+    __slots__ = ('lease_id', 'worker_id', 'ticker', 'cells', 'next_index', 'limit', 'last_seen')
+
+    def __init__(self, lease_id: int, worker_id: int, ticker: str, cells: List[Tuple]):
+        self.lease_id = lease_id
+        self.worker_id = worker_id
+        self.ticker = ticker
+        self.cells = cells
+        self.next_index = 0
+        self.limit = len(cells)
+        self.last_seen = time.monotonic()
+
+    def remaining(self) -> List[Tuple]:
+        return self.cells[self.next_index:self.limit]
+
+
+class SweepCoordinator:
+    """
+    Hands out sweep leases to workers and aggregates their results.
+
+    Parameters:
+    -----------
+    tickers : Sequence[str]
+        Tickers to sweep
+    start, end : str
+        Date range passed to get_price_data on the workers
+    thresholds, decel_rates : Sequence[float]
+        Entry thresholds and deceleration rates to sweep
+    step : float
+        Alpha/beta grid step, as in perform_grid_search
+    use_macro : bool
+        Whether workers filter entries with the macro signal
+    macro_df : pd.DataFrame, optional
+        Macro signal sent to the workers; fetched here with get_macro_data
+        when use_macro is set and it is not given
+    interval : str
+        Price interval
+    cache_dir : str
+        Price cache directory shared by the workers
+    host, port : str, int
+        Address to listen on (port 0 picks a free port)
+    authkey : bytes, optional
+        Shared secret (random if not given; local workers receive it)
+    lease_size : int
+        Cells per lease
+    lease_timeout : float
+        Seconds without progress after which a lease is handed to another worker
+    results_writer : SweepResultsWriter, optional
+        Receives every evaluation as it arrives
+    """
+
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        start: str,
+        end: str,
+        thresholds: Sequence[float],
+        decel_rates: Sequence[float],
+        step: float = 0.05,
+        use_macro: bool = False,
+        macro_df: Optional[pd.DataFrame] = None,
+        interval: str = "1d",
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        authkey: Optional[bytes] = None,
+        lease_size: int = 64,
+        lease_timeout: float = 60.0,
+        results_writer=None
+    ):
+        if use_macro and macro_df is None:
+            # Fetched once here, so a failure stops the sweep before any work
+            from strategy.data import get_macro_data
+            macro_df = get_macro_data(start, end)
+
+        self.config = {
+            'start': start, 'end': end, 'interval': interval,
+            'cache_dir': cache_dir, 'macro_df': macro_df if use_macro else None,
+        }
+        self.authkey = authkey or os.urandom(16)
+        self.lease_timeout = lease_timeout
+        self.results_writer = results_writer
+
+        r = np.arange(step, 1.0, step)
+        ab = [(a, b) for a in r for b in r if a < b]
+
+        self.pending = deque()
+        self.total = 0
+        for ticker in tickers:
+            cells = [(a, b, th, dr) for th, dr in itertools.product(thresholds, decel_rates) for a, b in ab]
+            for i in range(0, len(cells), lease_size):
+                self.pending.append((ticker, cells[i:i + lease_size]))
+            self.total += len(cells)
+
+        self.results = {}
+        self.leases = {}
+        self.worker_ticker = {}
+        self.next_lease_id = 0
+        self.next_worker_id = 0
+        self.connected = 0
+        self.stats = {'leases': 0, 'stolen': 0, 'released': 0, 'workers': 0}
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+
+        self.listener = Listener((host, port), authkey=self.authkey)
+        self.address = self.listener.address
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+
+    # -- lease bookkeeping (called with self.lock held) ----------------------
+
+    def _new_lease(self, worker_id: int, ticker: str, cells: List[Tuple]) -> _Lease:
+        lease = _Lease(self.next_lease_id, worker_id, ticker, cells)
+        self.next_lease_id += 1
+        self.leases[lease.lease_id] = lease
+        self.worker_ticker[worker_id] = ticker
+        self.stats['leases'] += 1
+        return lease
+
+    def _release(self, lease: _Lease):
+        """Returns a lease's unfinished cells to the pending queue."""
+        self.leases.pop(lease.lease_id, None)
+        todo = [c for c in lease.remaining() if (lease.ticker,) + tuple(c) not in self.results]
+        if todo:
+            self.pending.appendleft((lease.ticker, todo))
+            self.stats['released'] += 1
+
+    def _assign(self, worker_id: int) -> Optional[_Lease]:
+        if self.pending:
+            # Prefer a lease for the ticker this worker already has loaded
+            current = self.worker_ticker.get(worker_id)
+            for k, (ticker, _) in enumerate(self.pending):
+                if ticker == current:
+                    break
+            else:
+                k = 0
+            ticker, cells = self.pending[k]
+            del self.pending[k]
+            return self._new_lease(worker_id, ticker, cells)
+
+        # Work stealing: split the largest running lease in half
+        victim = max(self.leases.values(), key=lambda l: l.limit - l.next_index, default=None)
+        if victim is None or victim.limit - victim.next_index < 2:
+            return None
+        mid = victim.next_index + (victim.limit - victim.next_index + 1) // 2
+        stolen = victim.cells[mid:victim.limit]
+        victim.limit = mid
+        self.stats['stolen'] += 1
+        return self._new_lease(worker_id, victim.ticker, stolen)
+
+    def _record(self, rows: List[Dict]):
+        for row in rows:
+            key = tuple(row[k] for k in _CELL_KEYS)
+            if key in self.results:
+                continue
+            self.results[key] = row
+            if self.results_writer is not None and 'error' not in row:
+                self.results_writer.append(
+                    {k: row[k] for k in _CELL_KEYS},
+                    {k: v for k, v in row.items() if k not in _CELL_KEYS}
+                )
+        if len(self.results) >= self.total:
+            self.finished.set()
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        for lease in list(self.leases.values()):
+            if now - lease.last_seen > self.lease_timeout:
+                self._release(lease)
+
+    # -- connections ---------------------------------------------------------
+
+    def _accept_loop(self):
+        while not self.finished.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                if self.finished.is_set():
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with self.lock:
+            worker_id = self.next_worker_id
+            self.next_worker_id += 1
+            self.connected += 1
+            self.stats['workers'] += 1
+
+        try:
+            conn.recv()  # hello
+            conn.send(self.config)
+            while True:
+                msg = conn.recv()
+                with self.lock:
+                    if msg['type'] == 'request':
+                        reply = self._handle_request(worker_id)
+                    else:
+                        reply = self._handle_progress(msg)
+                conn.send(reply)
+                if reply['type'] == 'done':
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            with self.lock:
+                self.connected -= 1
+                for lease in [l for l in self.leases.values() if l.worker_id == worker_id]:
+                    self._release(lease)
+
+    def _handle_request(self, worker_id: int) -> Dict:
+        if self.finished.is_set():
+            return {'type': 'done'}
+        lease = self._assign(worker_id)
+        if lease is None:
+            return {'type': 'wait', 'retry_after': 0.05}
+        return {'type': 'lease', 'lease_id': lease.lease_id, 'ticker': lease.ticker, 'cells': lease.cells}
+
+    def _handle_progress(self, msg: Dict) -> Dict:
+        self._record(msg['rows'])
+        lease = self.leases.get(msg['lease_id'])
+        if lease is None:
+            # Lease expired and was handed out again: stop working on it
+            return {'type': 'ack', 'limit': 0}
+        lease.next_index = msg['next_index']
+        lease.last_seen = time.monotonic()
+        if lease.next_index >= lease.limit:
+            del self.leases[lease.lease_id]
+        return {'type': 'ack', 'limit': lease.limit}
+
+    # -- public API ----------------------------------------------------------
+
+    def start(self):
+        self._accept_thread.start()
+        return self
+
+    def wait(
+        self,
+        timeout: Optional[float] = None,
+        progress: bool = True,
+        local_workers: Sequence[multiprocessing.Process] = ()
+    ) -> bool:
+        """
+        Blocks until every cell has a result (or the timeout passes),
+        expiring silent leases along the way.
+
+        Raises RuntimeError once all `local_workers` have exited while no
+        worker is connected, since nothing would finish the sweep.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        last_report = 0
+        while not self.finished.wait(0.5):
+            with self.lock:
+                self._expire_leases()
+                done = len(self.results)
+                connected = self.connected
+            if (local_workers and connected == 0 and not self.finished.is_set()
+                    and not any(w.is_alive() for w in local_workers)):
+                codes = ', '.join(str(w.exitcode) for w in local_workers)
+                raise RuntimeError(f"All local workers exited (exit codes {codes}) with "
+                                   f"{done}/{self.total} cells evaluated and no worker connected")
+            if progress and done - last_report >= max(1, self.total // 20):
+                print(f"  {done}/{self.total} cells evaluated")
+                last_report = done
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+        return True
+
+    def close(self):
+        self.finished.set()
+        self.listener.close()
+
+    def aggregate(self) -> Dict[Tuple[str, float, float], Tuple[pd.DataFrame, Dict[str, float]]]:
+        """
+        Builds perform_grid_search-shaped output from the collected results.
+
+        Returns:
+        --------
+        Dict[(ticker, threshold, decel_rate), Tuple[pd.DataFrame, Dict]]
+            (heatmap_data, best_params) for every swept combination
+        """
+        with self.lock:
+            rows = list(self.results.values())
+        if not rows:
+            return {}
+        df = pd.DataFrame(rows)
+
+        output = {}
+        for (ticker, threshold, decel_rate), group in df.groupby(['ticker', 'threshold', 'decel_rate'], sort=False):
+            # Same tie-breaking as perform_grid_search: first strictly better
+            # cell in (alpha, beta) scan order wins
+            group = group.sort_values(['alpha', 'beta'])
+            sharpe = group['Sharpe Ratio'].to_numpy()
+            best_params = {}
+            if np.any(sharpe > -np.inf):
+                best = group.iloc[int(np.nanargmax(np.where(np.isnan(sharpe), -np.inf, sharpe)))]
+                best_params = {'alpha': best['alpha'], 'beta': best['beta']}
+
+            heatmap_df = pd.DataFrame({
+                'alpha': group['alpha'].round(2),
+                'beta': group['beta'].round(2),
+                'Sharpe': group['Sharpe Ratio'],
+            })
+            heatmap_data = heatmap_df.pivot(index='alpha', columns='beta', values='Sharpe')
+            output[(ticker, threshold, decel_rate)] = (heatmap_data, best_params)
+        return output
+
+
+def run_distributed_sweep(
+    tickers: Sequence[str],
+    start: str,
+    end: str,
+    thresholds: Sequence[float],
+    decel_rates: Sequence[float],
+    step: float = 0.05,
+    local_workers: int = 0,
+    progress: bool = True,
+    **coordinator_kwargs
+) -> Dict[Tuple[str, float, float], Tuple[pd.DataFrame, Dict[str, float]]]:
+    """
+    Runs a sweep through a SweepCoordinator, optionally with local worker
+    processes. Remote workers can join at any time with `run_worker`.
+
+    Returns:
+    --------
+    Dict[(ticker, threshold, decel_rate), Tuple[pd.DataFrame, Dict]]
+        (heatmap_data, best_params) for every swept combination
+    """
+    cache_dir = coordinator_kwargs.get('cache_dir', DEFAULT_CACHE_DIR)
+    if cache_dir is not None:
+        # Fill the shared cache concurrently, and fail before any worker starts
+        from strategy.fetch import DataFetcher
+        DataFetcher().prices(tickers, start, end, interval=coordinator_kwargs.get('interval', '1d'), cache_dir=cache_dir)
+
+    coordinator = SweepCoordinator(
+        tickers, start, end, thresholds, decel_rates, step=step, **coordinator_kwargs
+    ).start()
+    print(f"Coordinator listening on {coordinator.address[0]}:{coordinator.address[1]} "
+          f"({coordinator.total} cells)")
+
+    ctx = multiprocessing.get_context('spawn')
+    workers = [
+        ctx.Process(target=run_worker, args=(coordinator.address, coordinator.authkey), daemon=True)
+        for _ in range(local_workers)
+    ]
+    for w in workers:
+        w.start()
+
+    started = time.perf_counter()
+    try:
+        coordinator.wait(progress=progress, local_workers=workers)
+    finally:
+        elapsed = time.perf_counter() - started
+        # Let workers collect their 'done' reply before the listener goes away
+        for w in workers:
+            w.join(timeout=5)
+        coordinator.close()
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+
+    stats = coordinator.stats
+    print(f"Sweep finished in {elapsed:.2f}s ({coordinator.total / max(elapsed, 1e-9):,.1f} cells/s, "
+          f"{stats['workers']} workers, {stats['leases']} leases, "
+          f"{stats['stolen']} stolen, {stats['released']} re-leased)")
+    return coordinator.aggregate()
+
+
+def _parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Distributed alpha/beta sweep.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sweep = sub.add_parser('sweep', help="Run a coordinator (and optional local workers)")
+    sweep.add_argument('tickers', nargs='+')
+    sweep.add_argument('--start', required=True)
+    sweep.add_argument('--end', required=True)
+    sweep.add_argument('--thresholds', type=float, nargs='+', default=[0.00015])
+    sweep.add_argument('--decel-rates', type=float, nargs='+', default=[0.0005])
+    sweep.add_argument('--step', type=float, default=0.05)
+    sweep.add_argument('--use-macro', action='store_true')
+    sweep.add_argument('--interval', default='1d')
+    sweep.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    sweep.add_argument('--host', default='127.0.0.1')
+    sweep.add_argument('--port', type=int, default=0)
+    sweep.add_argument('--authkey', default=None)
+    sweep.add_argument('--local-workers', type=int, default=os.cpu_count() or 1)
+    sweep.add_argument('--lease-size', type=int, default=64)
+    sweep.add_argument('--lease-timeout', type=float, default=60.0)
+
+    worker = sub.add_parser('worker', help="Join a running coordinator")
+    worker.add_argument('address', help="host:port of the coordinator")
+    worker.add_argument('--authkey', required=True)
+    worker.add_argument('--report-every', type=int, default=8)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        run_worker(_parse_address(args.address), args.authkey.encode(), report_every=args.report_every)
+        return
+
+    results = run_distributed_sweep(
+        args.tickers, args.start, args.end, args.thresholds, args.decel_rates,
+        step=args.step,
+        local_workers=args.local_workers,
+        use_macro=args.use_macro,
+        interval=args.interval,
+        cache_dir=args.cache_dir,
+        host=args.host,
+        port=args.port,
+        authkey=args.authkey.encode() if args.authkey else None,
+        lease_size=args.lease_size,
+        lease_timeout=args.lease_timeout
+    )
+    for (ticker, threshold, decel_rate), (_, best_params) in results.items():
+        print(f"{ticker} threshold={threshold} decel_rate={decel_rate}: {best_params}")
+
+
+if __name__ == "__main__":
+    main()
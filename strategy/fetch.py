@@ -0,0 +1,414 @@
+"""
+Concurrent Fetch Module
+=======================
+Downloads many price series (Yahoo Finance chart API) and FRED series at
+once through a bounded pool of keep-alive connections.
+
+Every request has a timeout and is retried with exponential backoff on
+timeouts, connection errors and HTTP 429/5xx. Whatever still fails is
+reported per ticker or series; nothing is silently replaced. With enough
+connections, a load takes about as long as its slowest request.
+
+The transport is pluggable. HTTPTransport talks to the real endpoints (or
+to a local stand-in server when DataFetcher is given other base URLs), and
+FixtureTransport serves recorded responses from files.
+
+Usage:
+    fetcher = DataFetcher(max_connections=50, timeout=10, retries=3)
+    result = fetcher.fetch("2025-01-01", "2026-01-01", tickers=pairs, series=["GDP"], interval="1h")
+    result.raise_for_failures()
+
+    # Offline / tests: record once, then replay from files
+    fetcher = DataFetcher(transport=FixtureTransport("fixtures", record_from=HTTPTransport()))
+"""
+
+import gzip
+import http.client
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import parse_qs, quote, urlencode, urlsplit
+
+import pandas as pd
+
+from strategy.cache import covers, load_prices, save_prices, slice_range
+
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart"
+FRED_CSV_URL = "https://fred.stlouisfed.org/graph/fredgraph.csv"
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TransportError(Exception):
+    """A failed request. retryable tells the fetcher whether to try again."""
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class FetchFailure(NamedTuple):
+    """Why one ticker or series could not be loaded."""
+    kind: str  # 'price' or 'series'
+    key: str
+    url: str
+    attempts: int
+    error: str
+
+
+class FetchError(Exception):
+    """Raised when a fetch has failures and the caller asked for all or nothing."""
+
+    def __init__(self, failures: Dict[str, FetchFailure]):
+        lines = [f"  {f.key}: {f.error} (after {f.attempts} attempt{'s' if f.attempts > 1 else ''})"
+                 for f in failures.values()]
+        super().__init__(f"{len(failures)} request(s) failed:\n" + "\n".join(lines))
+        self.failures = failures
+
+
+class FetchResult(NamedTuple):
+    """Frames that loaded, plus failures keyed by ticker or series id."""
+    prices: Dict[str, pd.DataFrame]
+    series: Dict[str, pd.Series]
+    failures: Dict[str, FetchFailure]
+    elapsed: float
+
+    def raise_for_failures(self):
+        if self.failures:
+            raise FetchError(self.failures)
+
+
+class HTTPTransport:
+    """
+    GET over pooled keep-alive connections, at most `max_connections` open
+    per host at a time. Requests beyond that wait for a free connection.
+    """
+
+    def __init__(self, max_connections: int = 50, user_agent: str = DEFAULT_USER_AGENT):
+        self.max_connections = max_connections
+        self.user_agent = user_agent
+        self._slots = {}
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, host_key):
+        with self._lock:
+            if host_key not in self._slots:
+                self._slots[host_key] = threading.BoundedSemaphore(self.max_connections)
+                self._idle[host_key] = []
+            return self._slots[host_key], self._idle[host_key]
+
+    def _connect(self, parts, timeout: float) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        return cls(parts.hostname, parts.port, timeout=timeout)
+
+    def get(self, url: str, timeout: float) -> bytes:
+        parts = urlsplit(url)
+        host_key = (parts.scheme, parts.netloc)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        headers = {'User-Agent': self.user_agent, 'Accept-Encoding': 'gzip', 'Connection': 'keep-alive'}
+        slots, idle = self._pool(host_key)
+
+        with slots:
+            with self._lock:
+                conn = idle.pop() if idle else None
+            reused = conn is not None
+            while True:
+                if conn is None:
+                    conn = self._connect(parts, timeout)
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                try:
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    body = response.read()
+                    break
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    conn = None
+                    # The server may have dropped an idle connection; reconnect once
+                    if reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                        reused = False
+                        continue
+                    raise TransportError(f"{type(e).__name__}: {e}", retryable=True) from e
+
+            if response.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    idle.append(conn)
+
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        if response.status >= 400:
+            raise TransportError(f"HTTP {response.status} {response.reason}", status=response.status,
+                                 retryable=response.status in RETRYABLE_STATUS)
+        return body
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+                idle.clear()
+
+
+class FixtureTransport:
+    """
+    Serves responses from files named after the request URL (host, path and
+    the 'id' / 'interval' query parameters; dates are ignored, so a fixture
+    holds the whole history and the fetcher slices it).
+
+    Parameters:
+    -----------
+    directory : str
+        Directory holding the fixture files
+    record_from : transport, optional
+        Fetch missing fixtures through this transport and save them
+    """
+
+    KEY_PARAMS = ('id', 'interval')
+
+    def __init__(self, directory: str, record_from=None):
+        self.directory = directory
+        self.record_from = record_from
+
+    def path_for(self, url: str) -> str:
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        name = parts.netloc + parts.path
+        for param in self.KEY_PARAMS:
+            if param in query:
+                name += f"_{param}={query[param][0]}"
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9=.-]+", "_", name))
+
+    def get(self, url: str, timeout: float) -> bytes:
+        path = self.path_for(url)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        if self.record_from is None:
+            raise TransportError(f"No fixture for {url} (expected {path})", status=404)
+        body = self.record_from.get(url, timeout)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return body
+
+
+def _is_daily(interval: str) -> bool:
+    return interval.endswith(('d', 'wk', 'mo'))
+
+
+def parse_yahoo_chart(body: bytes, interval: str = "1d") -> pd.DataFrame:
+    """
+    OHLCV bars from a Yahoo chart API response, indexed like yf.download:
+    exchange-timezone timestamps for intraday bars, naive dates otherwise.
+    """
+    chart = json.loads(body).get('chart', {})
+    if chart.get('error'):
+        raise ValueError(chart['error'].get('description', chart['error']))
+    result = (chart.get('result') or [None])[0]
+    if not result or not result.get('timestamp'):
+        raise ValueError("No price data returned")
+
+    quote_data = result['indicators']['quote'][0]
+    index = pd.to_datetime(result['timestamp'], unit='s', utc=True)
+    tz = result.get('meta', {}).get('exchangeTimezoneName')
+    if tz:
+        index = index.tz_convert(tz)
+    if _is_daily(interval):
+        index = index.tz_localize(None).normalize()
+    index.name = 'Date' if _is_daily(interval) else 'Datetime'
+
+    df = pd.DataFrame({
+        col: pd.to_numeric(pd.Series(quote_data.get(col.lower(), []), dtype=object), errors='coerce').to_numpy()
+        for col in ('Open', 'High', 'Low', 'Close', 'Volume')
+    }, index=index)
+    df = df[df['Close'].notna().to_numpy()]
+    # The live bar can repeat the last timestamp
+    return df[~df.index.duplicated(keep='last')]
+
+
+def parse_fred_csv(body: bytes, series_id: str) -> pd.Series:
+    """One series from FRED's fredgraph.csv download ('.' marks missing values)."""
+    try:
+        df = pd.read_csv(io.BytesIO(body), index_col=0, parse_dates=True, na_values='.')
+    except Exception as e:
+        raise ValueError(f"Unreadable FRED response: {e}") from e
+    if series_id not in df.columns:
+        raise ValueError(f"FRED response has no column '{series_id}'")
+    series = df[series_id].astype(float)
+    series.index.name = 'DATE'
+    return series
+
+
+class _Job(NamedTuple):
+    kind: str
+    key: str
+    url: str
+    parse: Callable[[bytes], object]
+
+
+class DataFetcher:
+    """
+    Concurrent loader for price and FRED series.
+
+    Parameters:
+    -----------
+    transport : HTTPTransport, FixtureTransport or any object with get(url, timeout) -> bytes
+        Defaults to an HTTPTransport with `max_connections` per host
+    max_connections : int
+        Connections per host (and twice as many worker threads overall)
+    timeout : float
+        Per-request timeout in seconds
+    retries : int
+        Extra attempts for retryable failures
+    backoff : float
+        First retry delay in seconds; doubles per attempt, with jitter
+    yahoo_url, fred_url : str
+        Endpoint base URLs (point them at a local server in tests)
+    """
+
+    def __init__(
+        self,
+        transport=None,
+        max_connections: int = 50,
+        timeout: float = 10.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        yahoo_url: str = YAHOO_CHART_URL,
+        fred_url: str = FRED_CSV_URL
+    ):
+        self.transport = transport if transport is not None else HTTPTransport(max_connections)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.yahoo_url = yahoo_url.rstrip('/')
+        self.fred_url = fred_url
+
+    def _price_job(self, ticker: str, start: str, end: str, interval: str) -> _Job:
+        params = urlencode({
+            'period1': int(pd.Timestamp(start, tz='UTC').timestamp()),
+            'period2': int(pd.Timestamp(end, tz='UTC').timestamp()),
+            'interval': interval,
+            'includePrePost': 'false',
+        })
+        url = f"{self.yahoo_url}/{quote(ticker)}?{params}"
+        return _Job('price', ticker, url, lambda body: slice_range(parse_yahoo_chart(body, interval), start, end))
+
+    def _series_job(self, series_id: str, start: str, end: str) -> _Job:
+        url = f"{self.fred_url}?{urlencode({'id': series_id, 'cosd': start, 'coed': end})}"
+        return _Job('series', series_id, url, lambda body: parse_fred_csv(body, series_id).loc[start:end])
+
+    def _run(self, job: _Job):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return job.parse(self.transport.get(job.url, self.timeout))
+            except Exception as e:
+                retryable = getattr(e, 'retryable', isinstance(e, (TimeoutError, ConnectionError)))
+                if not retryable or attempt > self.retries:
+                    return FetchFailure(job.kind, job.key, job.url, attempt, f"{type(e).__name__}: {e}")
+            time.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.0))
+
+    def fetch(
+        self,
+        start: str,
+        end: str,
+        tickers: Iterable[str] = (),
+        series: Iterable[str] = (),
+        interval: str = "1d",
+        cache_dir: Optional[str] = None
+    ) -> FetchResult:
+        """
+        Loads all tickers and series concurrently.
+
+        Parameters:
+        -----------
+        start, end : str
+            Date range; prices cover [start, end) like get_price_data,
+            FRED series [start, end] like pandas_datareader
+        tickers : iterable of str
+            Yahoo Finance symbols
+        series : iterable of str
+            FRED series ids
+        interval : str
+            Price interval
+        cache_dir : str, optional
+            Serve tickers from the price cache when it covers the range and
+            store newly downloaded bars there
+
+        Returns:
+        --------
+        FetchResult
+            (prices, series, failures, elapsed seconds)
+        """
+        started = time.perf_counter()
+        prices, loaded_series, failures = {}, {}, {}
+
+        jobs: List[_Job] = []
+        for ticker in dict.fromkeys(tickers):
+            if cache_dir is not None:
+                cached = load_prices(ticker, interval, cache_dir)
+                if covers(cached, start, end):
+                    prices[ticker] = slice_range(cached, start, end)
+                    continue
+            jobs.append(self._price_job(ticker, start, end, interval))
+        for series_id in dict.fromkeys(series):
+            jobs.append(self._series_job(series_id, start, end))
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(len(jobs), 2 * self.max_connections)) as pool:
+                outcomes = list(pool.map(self._run, jobs))
+            for job, outcome in zip(jobs, outcomes):
+                if isinstance(outcome, FetchFailure):
+                    failures[job.key] = outcome
+                elif job.kind == 'price':
+                    prices[job.key] = outcome
+                    if cache_dir is not None and not outcome.empty:
+                        save_prices(outcome, job.key, start, end, interval=interval, cache_dir=cache_dir)
+                else:
+                    loaded_series[job.key] = outcome
+
+        elapsed = time.perf_counter() - started
+        n_loaded = len(prices) + len(loaded_series)
+        print(f"Loaded {n_loaded}/{n_loaded + len(failures)} tickers and series in {elapsed:.2f}s "
+              f"({len(jobs)} requested)")
+        for failure in failures.values():
+            print(f"  FAILED {failure.key}: {failure.error}")
+        return FetchResult(prices, loaded_series, failures, elapsed)
+
+    def prices(
+        self,
+        tickers: Iterable[str],
+        start: str,
+        end: str,
+        interval: str = "1d",
+        cache_dir: Optional[str] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """OHLCV bars per ticker; raises FetchError if any ticker failed."""
+        result = self.fetch(start, end, tickers=tickers, interval=interval, cache_dir=cache_dir)
+        result.raise_for_failures()
+        return result.prices
+
+    def series(self, series_ids: Iterable[str], start: str, end: str) -> pd.DataFrame:
+        """FRED series as columns on their joined dates; raises FetchError if any failed."""
+        series_ids = list(series_ids)
+        result = self.fetch(start, end, series=series_ids)
+        result.raise_for_failures()
+        return pd.concat([result.series[s] for s in series_ids], axis=1)
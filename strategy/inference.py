@@ -0,0 +1,403 @@
+"""
+Inference Service Module
+========================
+Long-running local process that keeps saved models in memory and scores
+feature rows for many instruments at once.
+
+Requests from all clients are queued. The batcher takes whatever arrived
+within `max_wait` seconds, stacks the rows per model and makes one
+vectorized predict_proba call per model, then splits the probabilities
+back per request and instrument. Models are loaded once, at start-up,
+from the store in strategy.models.
+
+to_signal() turns probabilities into a 'Macro_Signal' frame, so a model
+can filter entries in run_strategy the same way the macro data does.
+
+Usage:
+    server$ python -m strategy.inference serve eurusd_stack lstm:3 --port 6010 --authkey SECRET
+
+    client = InferenceClient(("127.0.0.1", 6010), b"SECRET")
+    signals = client.signals("eurusd_stack", {"EURUSD=X": eur_features, "GBPUSD=X": gbp_features})
+    metrics, strategy_df, trades_df = run_strategy(data, alpha, beta, macro_df=signals["EURUSD=X"])
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from strategy.models import DEFAULT_MODEL_DIR, load_model
+
+
+def to_signal(proba: pd.Series, long_above: float = 0.6, short_below: float = 0.4) -> pd.DataFrame:
+    """
+    Maps probabilities to a run_strategy filter.
+
+    Parameters:
+    -----------
+    proba : pd.Series
+        Probability of the bullish class, indexed by date
+    long_above : float
+        Allow long entries where proba >= long_above
+    short_below : float
+        Allow short entries where proba <= short_below
+
+    Returns:
+    --------
+    pd.DataFrame
+        'Macro_Signal' column: 1 (longs allowed), -1 (shorts allowed) or
+        0 (no new entries), for run_strategy(..., macro_df=...)
+    """
+    values = proba.to_numpy(dtype=float)
+    signal = np.where(values >= long_above, 1, np.where(values <= short_below, -1, 0))
+    return pd.DataFrame({'Macro_Signal': signal}, index=proba.index)
+
+
+def _positive_proba(model: Any, X: np.ndarray) -> np.ndarray:
+    proba = np.asarray(model.predict_proba(X))
+    return proba[:, -1] if proba.ndim == 2 else proba
+
+
+def _as_rows(values, expected_ndim: int, n_features: int) -> np.ndarray:
+    rows = np.asarray(values, dtype=float)
+    # A single row (or a single sequence) per instrument
+    if rows.ndim == expected_ndim - 1:
+        rows = rows[None]
+    if rows.ndim != expected_ndim or rows.shape[-1] != n_features:
+        raise ValueError(f"Expected {expected_ndim}-D feature rows with {n_features} features, got shape {rows.shape}")
+    return rows
+
+
+def score_batch(model: Any, rows: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Scores the rows of many instruments with one predict_proba call.
+
+    Returns:
+    --------
+    Dict[str, np.ndarray]
+        {instrument: positive-class probability per row}
+    """
+    keys = list(rows)
+    counts = [len(rows[k]) for k in keys]
+    proba = _positive_proba(model, np.concatenate([rows[k] for k in keys]))
+    return dict(zip(keys, np.split(proba, np.cumsum(counts)[:-1])))
+
+
+class _Request:
+    __slots__ = ('model', 'rows', 'n_rows', 'done', 'result', 'error')
+
+    def __init__(self, model: str, rows: Dict[str, np.ndarray]):
+        self.model = model
+        self.rows = rows
+        self.n_rows = sum(len(r) for r in rows.values())
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceServer:
+    """
+    Model server with request batching.
+
+    Parameters:
+    -----------
+    models : sequence of str or (str, int)
+        Models to load, by name (latest version) or (name, version)
+    model_dir : str
+        Root directory of the model store
+    host, port : str, int
+        Address to listen on (port 0 picks a free port)
+    authkey : bytes, optional
+        Shared secret clients must present (random if not given)
+    max_wait : float
+        Seconds the batcher waits for more requests after the first one
+    max_batch_rows : int
+        Rows at which a batch is scored without waiting further
+    """
+
+    def __init__(
+        self,
+        models: Sequence[Union[str, Tuple[str, int]]],
+        model_dir: str = DEFAULT_MODEL_DIR,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        authkey: Optional[bytes] = None,
+        max_wait: float = 0.002,
+        max_batch_rows: int = 65536
+    ):
+        self.models = {}
+        self.metadata = {}
+        for spec in models:
+            name, version = (spec, None) if isinstance(spec, str) else spec
+            model, metadata = load_model(name, version, model_dir)
+            self.models[name] = model
+            self.metadata[name] = metadata
+            print(f"Loaded {name} v{metadata['version']} ({metadata['model_class']})")
+
+        self.authkey = authkey or os.urandom(16)
+        self.max_wait = max_wait
+        self.max_batch_rows = max_batch_rows
+        self.stats = {'requests': 0, 'rows': 0, 'batches': 0, 'predict_calls': 0}
+        self._queue = queue.Queue()
+        self._closed = threading.Event()
+        self._host, self._port = host, port
+        self.listener = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.listener.address
+
+    def start(self) -> "InferenceServer":
+        """Starts listening and batching in background threads."""
+        self.listener = Listener((self._host, self._port), authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        """Blocks until close() is called (or Ctrl-C)."""
+        try:
+            self._closed.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        self._closed.set()
+        if self.listener is not None:
+            self.listener.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _accept_loop(self):
+        while not self._closed.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # Listener closed, or a client failed authentication
+                continue
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def _serve_client(self, conn):
+        try:
+            while True:
+                msg = conn.recv()
+                if msg['type'] == 'info':
+                    conn.send({'type': 'info', 'models': self.metadata})
+                elif msg['type'] == 'predict_proba':
+                    conn.send(self._predict(msg['model'], msg['rows']))
+                else:
+                    conn.send({'type': 'error', 'error': f"Unknown request type '{msg['type']}'"})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _predict(self, name: str, rows: Dict[str, Any]) -> Dict[str, Any]:
+        if name not in self.models:
+            return {'type': 'error', 'error': f"Model '{name}' is not loaded (have: {', '.join(self.models)})"}
+        # Reject rows of the wrong shape here; values the model itself rejects
+        # only fail their own request (see _run_batch)
+        expected_ndim = 3 if self.metadata[name]['kind'] == 'keras' else 2
+        n_features = len(self.metadata[name]['feature_cols'])
+        checked = {}
+        for key, values in rows.items():
+            try:
+                checked[key] = _as_rows(values, expected_ndim, n_features)
+            except ValueError as e:
+                return {'type': 'error', 'error': f"{key}: {e}"}
+        rows = checked
+        if not rows:
+            return {'type': 'result', 'proba': {}}
+
+        request = _Request(name, rows)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            return {'type': 'error', 'error': request.error}
+        return {'type': 'result', 'proba': request.result}
+
+    def _batch_loop(self):
+        while not self._closed.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            n_rows = first.n_rows
+            deadline = time.monotonic() + self.max_wait
+            while n_rows < self.max_batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                n_rows += request.n_rows
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Request]):
+        by_model = {}
+        for request in batch:
+            by_model.setdefault(request.model, []).append(request)
+
+        for name, requests in by_model.items():
+            model = self.models[name]
+            try:
+                # One predict_proba call for every instrument of every request
+                combined = {(i, key): rows for i, r in enumerate(requests) for key, rows in r.rows.items()}
+                self.stats['predict_calls'] += 1
+                scores = score_batch(model, combined)
+                for i, request in enumerate(requests):
+                    request.result = {key: scores[(i, key)] for key in request.rows}
+            except Exception as e:
+                if len(requests) == 1:
+                    requests[0].error = f"{type(e).__name__}: {e}"
+                else:
+                    # Rows one request got wrong (e.g. NaN the model rejects)
+                    # must not fail the others: score each request on its own
+                    for request in requests:
+                        try:
+                            self.stats['predict_calls'] += 1
+                            request.result = score_batch(model, request.rows)
+                        except Exception as e:
+                            request.error = f"{type(e).__name__}: {e}"
+            finally:
+                for request in requests:
+                    request.done.set()
+
+        self.stats['requests'] += len(batch)
+        self.stats['rows'] += sum(r.n_rows for r in batch)
+        self.stats['batches'] += 1
+
+
+class InferenceClient:
+    """
+    Connection to an InferenceServer. Safe to share between threads.
+
+    Parameters:
+    -----------
+    address : (str, int)
+        Server host and port
+    authkey : bytes
+        The server's shared secret
+    """
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes):
+        self.conn = Client(tuple(address), authkey=authkey)
+        self._lock = threading.Lock()
+        self._metadata = None
+
+    def _call(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.conn.send(msg)
+            reply = self.conn.recv()
+        if reply['type'] == 'error':
+            raise RuntimeError(f"Inference failed: {reply['error']}")
+        return reply
+
+    def info(self) -> Dict[str, Dict[str, Any]]:
+        """Metadata of the loaded models, by name."""
+        if self._metadata is None:
+            self._metadata = self._call({'type': 'info'})['models']
+        return self._metadata
+
+    def predict_proba(self, model: str, rows: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Positive-class probabilities for each instrument's feature rows
+        (a single row, or a single sequence for sequence models, is fine).
+        """
+        return self._call({'type': 'predict_proba', 'model': model, 'rows': rows})['proba']
+
+    def signals(
+        self,
+        model: str,
+        features: Dict[str, pd.DataFrame],
+        long_above: float = 0.6,
+        short_below: float = 0.4
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Scores date-indexed feature frames and returns one 'Macro_Signal'
+        frame per instrument (see to_signal).
+
+        Columns are taken in the order recorded in the model's metadata.
+        Rows with missing features (e.g. the first rows of lag features) are
+        not scored and get a signal of 0.
+        """
+        feature_cols = self.info()[model]['feature_cols']
+        rows, complete = {}, {}
+        for key, df in features.items():
+            missing = [c for c in feature_cols if c not in df.columns]
+            if missing:
+                raise KeyError(f"{key} is missing feature columns: {', '.join(missing)}")
+            values = df[feature_cols].to_numpy(dtype=float)
+            complete[key] = np.isfinite(values).all(axis=1)
+            if complete[key].any():
+                rows[key] = values[complete[key]]
+        proba = self.predict_proba(model, rows) if rows else {}
+
+        signals = {}
+        for key, df in features.items():
+            p = np.full(len(df), np.nan)
+            if key in proba:
+                p[complete[key]] = proba[key]
+            signals[key] = to_signal(pd.Series(p, index=df.index), long_above, short_below)
+        return signals
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parse_model(value: str) -> Union[str, Tuple[str, int]]:
+    name, _, version = value.partition(':')
+    return (name, int(version)) if version else name
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Batched model inference service.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="Load models and serve predictions")
+    serve.add_argument('models', nargs='+', help="Model names, optionally name:version")
+    serve.add_argument('--model-dir', default=DEFAULT_MODEL_DIR)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=6010)
+    serve.add_argument('--authkey', required=True)
+    serve.add_argument('--max-wait-ms', type=float, default=2.0)
+
+    args = parser.parse_args(argv)
+
+    server = InferenceServer(
+        [_parse_model(m) for m in args.models],
+        model_dir=args.model_dir,
+        host=args.host,
+        port=args.port,
+        authkey=args.authkey.encode(),
+        max_wait=args.max_wait_ms / 1e3
+    ).start()
+    print(f"Serving {', '.join(server.models)} on {server.address[0]}:{server.address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,12 @@ import pandas as pd
 import numpy as np
 from typing import Dict
 
+# Keys of the dict returned by calculate_metrics
+METRIC_NAMES = [
+    "Annual Return", "Annual Volatility", "Sharpe Ratio", "Max Drawdown", "Hit Rate",
+    "Total Trades", "Avg Win", "Avg Loss", "Win/Loss Ratio",
+]
+
 
 def calculate_metrics(equity_curve: pd.Series, trade_log: list) -> Dict[str, float]:
     """
@@ -0,0 +1,202 @@
+"""
+Model Store Module
+==================
+Versioned storage for trained signal models, so daily scoring loads a
+model instead of retraining it.
+
+Anything with a scikit-learn style predict_proba can be stored: the
+notebooks' scaler + classifier pipelines, calibrated models, voting and
+stacking ensembles. Keras sequence models (the LSTM) are stored through
+SequenceClassifier, which keeps the train-set normalization with them.
+
+Layout:
+    models/<name>/v<N>/model.pkl           pickled estimator
+    models/<name>/v<N>/model.keras         Keras model (SequenceClassifier)
+    models/<name>/v<N>/normalization.npz   its train-set mean and std
+    models/<name>/v<N>/metadata.json       version, features, library versions, checksums
+
+scikit-learn, TensorFlow and friends are not requirements of this package;
+they only need to be installed where the models are trained and served.
+
+Usage:
+    save_model(ensemble_stack_cal, "eurusd_stack", feature_cols,
+               info={"train_end": "2024-12-31", "target": "High >= 1.005 * Open"})
+    model, metadata = load_model("eurusd_stack")  # latest version
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import platform
+import shutil
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+DEFAULT_MODEL_DIR = "models"
+FORMAT_VERSION = 1
+
+# Recorded in the metadata when loaded at save time (never imported here)
+_TRACKED_LIBRARIES = ['numpy', 'pandas', 'sklearn', 'xgboost', 'lightgbm', 'catboost', 'hmmlearn', 'tensorflow', 'keras']
+
+
+class SequenceClassifier:
+    """
+    Keras sequence model plus the train-set feature normalization, exposed
+    through predict_proba on (n, seq_len, n_features) arrays.
+
+    Parameters:
+    -----------
+    model : keras.Model
+        Model with a single sigmoid output
+    mean, std : np.ndarray
+        Per-feature normalization computed on the training sequences
+    """
+
+    def __init__(self, model, mean: np.ndarray, std: np.ndarray):
+        self.model = model
+        self.mean = np.asarray(mean, dtype=np.float32).reshape(1, 1, -1)
+        self.std = np.asarray(std, dtype=np.float32).reshape(1, 1, -1)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = (np.asarray(X, dtype=np.float32) - self.mean) / self.std
+        p = np.asarray(self.model.predict(X, verbose=0), dtype=float).ravel()
+        return np.column_stack([1 - p, p])
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _library_versions() -> Dict[str, str]:
+    versions = {'python': platform.python_version()}
+    for name in _TRACKED_LIBRARIES:
+        module = sys.modules.get(name)
+        if module is not None:
+            versions[name] = getattr(module, '__version__', 'unknown')
+    return versions
+
+
+def list_versions(name: str, model_dir: str = DEFAULT_MODEL_DIR) -> List[int]:
+    """Saved versions of a model, oldest first."""
+    root = os.path.join(model_dir, name)
+    if not os.path.isdir(root):
+        return []
+    return sorted(int(d[1:]) for d in os.listdir(root) if d.startswith('v') and d[1:].isdigit())
+
+
+def save_model(
+    model: Any,
+    name: str,
+    feature_cols: Sequence[str],
+    model_dir: str = DEFAULT_MODEL_DIR,
+    info: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Saves a trained model as the next version of `name`.
+
+    Parameters:
+    -----------
+    model : estimator or SequenceClassifier
+        Fitted model with predict_proba
+    name : str
+        Model name, e.g. "eurusd_stack"
+    feature_cols : sequence of str
+        Feature columns in the order the model expects them
+    model_dir : str
+        Root directory of the model store
+    info : dict, optional
+        Extra JSON-serializable metadata (training period, target, threshold...)
+
+    Returns:
+    --------
+    str
+        Directory of the saved version
+    """
+    version = (list_versions(name, model_dir) or [0])[-1] + 1
+    final = os.path.join(model_dir, name, f"v{version}")
+    # Write into a hidden directory first, so readers never see a partial version
+    tmp = os.path.join(model_dir, name, f".v{version}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    if isinstance(model, SequenceClassifier):
+        kind = 'keras'
+        model.model.save(os.path.join(tmp, 'model.keras'))
+        np.savez(os.path.join(tmp, 'normalization.npz'), mean=model.mean.ravel(), std=model.std.ravel())
+    else:
+        kind = 'pickle'
+        with open(os.path.join(tmp, 'model.pkl'), 'wb') as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'name': name,
+        'version': version,
+        'kind': kind,
+        'model_class': f"{type(model).__module__}.{type(model).__qualname__}",
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'feature_cols': list(feature_cols),
+        'libraries': _library_versions(),
+        'artifacts': {f: _sha256(os.path.join(tmp, f)) for f in sorted(os.listdir(tmp))},
+        'info': info or {},
+    }
+    with open(os.path.join(tmp, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+    os.rename(tmp, final)
+    print(f"Saved {name} v{version} to {final}")
+    return final
+
+
+def load_metadata(name: str, version: Optional[int] = None, model_dir: str = DEFAULT_MODEL_DIR) -> Dict[str, Any]:
+    """Metadata of one version (the latest when version is None)."""
+    versions = list_versions(name, model_dir)
+    if not versions:
+        raise FileNotFoundError(f"No saved versions of '{name}' in {model_dir}")
+    version = versions[-1] if version is None else version
+    with open(os.path.join(model_dir, name, f"v{version}", 'metadata.json')) as f:
+        return json.load(f)
+
+
+def load_model(name: str, version: Optional[int] = None, model_dir: str = DEFAULT_MODEL_DIR) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Loads a saved model after checking its artifacts against the recorded
+    checksums.
+
+    Returns:
+    --------
+    Tuple[model, Dict]
+        (model with predict_proba, metadata)
+    """
+    metadata = load_metadata(name, version, model_dir)
+    path = os.path.join(model_dir, name, f"v{metadata['version']}")
+
+    for artifact, checksum in metadata['artifacts'].items():
+        if _sha256(os.path.join(path, artifact)) != checksum:
+            raise ValueError(f"{os.path.join(path, artifact)} does not match its recorded checksum")
+
+    if metadata['kind'] == 'keras':
+        from tensorflow import keras
+
+        norm = np.load(os.path.join(path, 'normalization.npz'))
+        model = SequenceClassifier(keras.models.load_model(os.path.join(path, 'model.keras')), norm['mean'], norm['std'])
+    else:
+        with open(os.path.join(path, 'model.pkl'), 'rb') as f:
+            model = pickle.load(f)
+
+    current = _library_versions()
+    mismatched = [f"{lib} {saved} -> {current[lib]}" for lib, saved in metadata['libraries'].items()
+                  if lib in current and current[lib] != saved]
+    if mismatched:
+        print(f"Warning: {name} v{metadata['version']} was saved with other library versions "
+              f"({', '.join(mismatched)})")
+    return model, metadata
@@ -11,7 +11,9 @@ def perform_grid_search(
     threshold: float,
     decel_rate: float,
     step: float = 0.05,
-    macro_df: Optional[pd.DataFrame] = None
+    macro_df: Optional[pd.DataFrame] = None,
+    results_writer=None,
+    pruning=None
 ) -> Tuple[pd.DataFrame, Dict[str, float]]:
     """
     Finds optimal Alpha/Beta parameters based on Sharpe Ratio.
@@ -28,6 +30,14 @@ def perform_grid_search(
         Step size for parameter grid search
     macro_df : pd.DataFrame, optional
         Macroeconomic signals DataFrame
+    results_writer : SweepResultsWriter, optional
+        If given, every evaluation's parameters, metrics and (if the writer
+        stores them) equity curve are streamed to it as the sweep runs
+    pruning : PruningPolicy, optional
+        Stop hopeless cells early (see strategy.pruning). Pruned cells are
+        NaN in heatmap_data, heatmap_data.attrs['pruned'] holds the reason
+        per cell ('' for cells that ran to the end), and best_params only
+        considers completed cells: it is empty when every cell was pruned.
     
     Returns:
     --------
@@ -41,31 +51,58 @@ def perform_grid_search(
 
     best_sharpe = -np.inf
     best_params = {}
+    if pruning is not None:
+        pruning.best_sharpe = best_sharpe
+        bars_total = bars_evaluated = 0
 
     for alpha in r:
         for beta in r:
             if alpha >= beta:
                 continue
 
-            metrics, _, _ = run_strategy(
+            metrics, strategy_df, _ = run_strategy(
                 data, alpha, beta,
                 threshold=threshold,
                 decel_rate=decel_rate,
-                macro_df=macro_df
+                macro_df=macro_df,
+                pruning=pruning
             )
+            pruned = metrics.get('Pruned', '')
+
+            if results_writer is not None:
+                results_writer.append(
+                    {'alpha': alpha, 'beta': beta, 'threshold': threshold, 'decel_rate': decel_rate},
+                    metrics,
+                    equity=strategy_df['Equity']
+                )
 
             results.append({
                 'alpha': round(alpha, 2),
                 'beta': round(beta, 2),
-                'Sharpe': metrics['Sharpe Ratio']
+                'Sharpe': np.nan if pruned else metrics['Sharpe Ratio'],
+                'Pruned': pruned
             })
 
+            if pruning is not None:
+                bars_total += len(data)
+                bars_evaluated += metrics['Bars Evaluated']
+                if pruned:
+                    continue
+
             if metrics['Sharpe Ratio'] > best_sharpe:
                 best_sharpe = metrics['Sharpe Ratio']
                 best_params = {'alpha': alpha, 'beta': beta}
+                if pruning is not None:
+                    pruning.best_sharpe = best_sharpe
 
     results_df = pd.DataFrame(results)
     heatmap_data = results_df.pivot(index='alpha', columns='beta', values='Sharpe')
 
+    if pruning is not None:
+        heatmap_data.attrs['pruned'] = results_df.pivot(index='alpha', columns='beta', values='Pruned')
+        n_pruned = int((results_df['Pruned'] != '').sum())
+        print(f"Pruned {n_pruned} of {len(results_df)} cells, "
+              f"simulated {bars_evaluated / max(bars_total, 1):.0%} of bars")
+
     return heatmap_data, best_params
 
@@ -0,0 +1,435 @@
+"""
+Paper Trading Module
+====================
+Asyncio engine that runs the strategy incrementally on a live or replayed
+bar feed, emits orders to a pluggable sink and records decision latency.
+
+Usage:
+    python -m strategy.paper EURUSD=X GBPUSD=X --interval 1h --speed 0
+"""
+
+import argparse
+import asyncio
+import math
+import time
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional
+
+import pandas as pd
+
+from strategy.cache import DEFAULT_CACHE_DIR, load_prices
+
+
+class Bar(NamedTuple):
+    """A single close print for one instrument."""
+    ticker: str
+    timestamp: pd.Timestamp
+    close: float
+    received_ns: int  # time.perf_counter_ns() when the bar arrived (its scheduled time on a paced replay)
+
+
+class Order(NamedTuple):
+    """An order emitted by the engine. position is the target after the fill."""
+    ticker: str
+    timestamp: pd.Timestamp
+    type: str  # 'Buy', 'Sell', 'Exit Long' or 'Exit Short'
+    price: float
+    position: int
+
+
+class IncrementalStrategy:
+    """
+    Per-instrument state for the run_strategy rules, updated one bar at a time.
+
+    Feeding the bars of a DataFrame through update() produces the same
+    trades and equity as run_strategy on that DataFrame.
+    """
+
+    __slots__ = (
+        'alpha', 'beta', 'threshold', 'decel_rate', 'use_macro',
+        'n_bars', 'es_slow', 'es_fast', 'diff', 'velocity',
+        'prev_price', 'position', 'entry_price', 'equity', 'trade_log'
+    )
+
+    def __init__(
+        self,
+        alpha: float,
+        beta: float,
+        threshold: float = 0.001,
+        decel_rate: float = 0.0005,
+        initial_capital: float = 10000,
+        use_macro: bool = False
+    ):
+        self.alpha = alpha
+        self.beta = beta
+        self.threshold = threshold
+        self.decel_rate = decel_rate
+        self.use_macro = use_macro
+
+        self.n_bars = 0
+        self.es_slow = 0.0
+        self.es_fast = 0.0
+        self.diff = 0.0
+        self.velocity = math.nan
+        self.prev_price = 0.0
+        self.position = 0
+        self.entry_price = 0.0
+        self.equity = initial_capital
+        self.trade_log = []
+
+    def update(self, price: float, macro_signal: float = 1) -> List[str]:
+        """
+        Consumes one close and returns the order types it triggered.
+        """
+        n = self.n_bars
+        self.n_bars = n + 1
+
+        if n == 0:
+            self.es_slow = self.es_fast = price
+            self.diff = 0.0
+            self.prev_price = price
+            return []
+
+        prev_fast = self.es_fast
+        prev_diff = self.diff
+        prev_velocity = self.velocity
+        self.es_slow += self.alpha * (price - self.es_slow)
+        self.es_fast += self.beta * (price - self.es_fast)
+        curr_diff = self.es_fast - self.es_slow
+        self.diff = curr_diff
+        self.velocity = self.es_fast - prev_fast
+
+        prev_price = self.prev_price
+        self.prev_price = price
+        if n == 1:
+            return []
+
+        accel = self.velocity - prev_velocity
+        actions = []
+
+        # Mark-to-Market
+        if self.position == 1:
+            self.equity *= 1 + (price - prev_price) / prev_price
+        elif self.position == -1:
+            self.equity *= 1 + (prev_price - price) / prev_price
+
+        # Exit (Deceleration)
+        if self.position == 1 and accel < -self.decel_rate:
+            self.trade_log.append(price - self.entry_price)
+            self.position = 0
+            actions.append('Exit Long')
+        elif self.position == -1 and accel > self.decel_rate:
+            self.trade_log.append(self.entry_price - price)
+            self.position = 0
+            actions.append('Exit Short')
+
+        # Entry
+        if prev_diff < 0 and curr_diff > self.threshold:
+            if not self.use_macro or macro_signal > 0:
+                if self.position == -1:
+                    self.trade_log.append(self.entry_price - price)
+                self.position = 1
+                self.entry_price = price
+                actions.append('Buy')
+        elif prev_diff > 0 and curr_diff < -self.threshold:
+            if not self.use_macro or macro_signal < 0:
+                if self.position == 1:
+                    self.trade_log.append(price - self.entry_price)
+                self.position = -1
+                self.entry_price = price
+                actions.append('Sell')
+
+        return actions
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in nanoseconds.
+
+    Each power of two is split into `sub_buckets` linear buckets, so recorded
+    values are accurate to within 1 / sub_buckets of their magnitude while
+    recording stays O(1) and memory stays constant.
+    """
+
+    def __init__(self, sub_buckets: int = 16, max_exponent: int = 40):
+        self.sub_buckets = sub_buckets
+        self.counts = [0] * (sub_buckets * (max_exponent + 1))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def _bucket(self, value_ns: int) -> int:
+        if value_ns < self.sub_buckets:
+            return value_ns
+        exponent = value_ns.bit_length() - 1
+        shift = exponent - self.sub_buckets.bit_length() + 1
+        sub = (value_ns >> shift) - self.sub_buckets
+        return min((shift + 1) * self.sub_buckets + sub, len(self.counts) - 1)
+
+    def _bucket_upper(self, bucket: int) -> int:
+        if bucket < self.sub_buckets:
+            return bucket
+        shift = bucket // self.sub_buckets - 1
+        sub = bucket % self.sub_buckets
+        return ((self.sub_buckets + sub + 1) << shift) - 1
+
+    def record(self, value_ns: int):
+        self.counts[self._bucket(value_ns)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, q: float) -> int:
+        """Upper bound (ns) of the bucket holding the q-th percentile."""
+        if self.count == 0:
+            return 0
+        target = math.ceil(self.count * q / 100.0)
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return min(self._bucket_upper(bucket), self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> Dict[str, float]:
+        """Latency summary in microseconds."""
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / max(1, self.count) / 1e3,
+            'p50_us': self.percentile(50) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+            'p99.9_us': self.percentile(99.9) / 1e3,
+            'max_us': self.max_ns / 1e3,
+        }
+
+
+class ListSink:
+    """Order sink that keeps every order in memory."""
+
+    def __init__(self):
+        self.orders = []
+
+    async def submit(self, order: Order):
+        self.orders.append(order)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.orders, columns=Order._fields)
+
+
+class PrintSink:
+    """Order sink that prints each order."""
+
+    async def submit(self, order: Order):
+        print(f"{order.timestamp} {order.ticker:<10} {order.type:<10} "
+              f"@ {order.price:.5f} -> position {order.position:+d}")
+
+
+class ReplayFeed:
+    """
+    Replays stored bars for many instruments in timestamp order.
+
+    Parameters:
+    -----------
+    prices : dict
+        {ticker: DataFrame with 'Close' column}
+    speed : float
+        Playback speed relative to the bar timestamps: 1.0 is real time,
+        60.0 plays an hour of bars per minute, 0 replays as fast as possible.
+        When paced, each bar is stamped with its scheduled arrival time, so
+        time a bar spends waiting behind earlier bars counts towards the
+        engine's latency. At full speed it is stamped when it is yielded.
+    """
+
+    def __init__(self, prices: Dict[str, pd.DataFrame], speed: float = 0.0):
+        frames = []
+        for ticker, df in prices.items():
+            close = df['Close'].squeeze()
+            frames.append(pd.DataFrame({
+                'ticker': ticker,
+                'close': close.to_numpy(dtype=float),
+            }, index=close.index))
+        stream = pd.concat(frames).sort_index(kind='stable')
+
+        self.speed = speed
+        self.timestamps = stream.index
+        self.tickers = stream['ticker'].to_numpy()
+        self.closes = stream['close'].to_numpy()
+
+    @classmethod
+    def from_cache(
+        cls,
+        tickers: Iterable[str],
+        interval: str = "1d",
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        speed: float = 0.0
+    ) -> 'ReplayFeed':
+        """Builds a feed from the local price cache, without any network access."""
+        prices = {}
+        for ticker in tickers:
+            df = load_prices(ticker, interval, cache_dir, start=start, end=end)
+            if df is None:
+                raise FileNotFoundError(f"No cached {interval} data for {ticker} in {cache_dir}")
+            prices[ticker] = df
+        return cls(prices, speed=speed)
+
+    def __len__(self) -> int:
+        return len(self.closes)
+
+    async def __aiter__(self) -> AsyncIterator[Bar]:
+        if len(self) == 0:
+            return
+        epoch_ns = self.timestamps.as_unit('ns').asi8
+        first_ns = epoch_ns[0]
+        wall_start = time.perf_counter_ns()
+        tickers = self.tickers.tolist()
+        closes = self.closes.tolist()
+
+        for i in range(len(closes)):
+            if self.speed > 0:
+                due = wall_start + int((epoch_ns[i] - first_ns) / self.speed)
+                delay = (due - time.perf_counter_ns()) / 1e9
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield Bar(tickers[i], self.timestamps[i], closes[i], due)
+            else:
+                if i % 1024 == 0:
+                    # Let other tasks run during a full-speed replay
+                    await asyncio.sleep(0)
+                yield Bar(tickers[i], self.timestamps[i], closes[i], time.perf_counter_ns())
+
+
+class PaperTradingEngine:
+    """
+    Runs the strategy incrementally for every instrument seen on its feeds.
+
+    Parameters:
+    -----------
+    sink : object
+        Anything with an `async submit(order)` method
+    alpha, beta, threshold, decel_rate, initial_capital :
+        Strategy parameters, as in run_strategy (applied per instrument)
+    macro_df : pd.DataFrame, optional
+        Macroeconomic signals DataFrame with 'Macro_Signal' column
+
+    Two latency histograms are kept: `latency` runs from each bar's
+    received_ns to its decision, so it includes time spent queued behind
+    other bars (the tick-to-decision figure to hold a target against);
+    `compute_latency` covers the strategy update alone.
+    """
+
+    def __init__(
+        self,
+        sink,
+        alpha: float,
+        beta: float,
+        threshold: float = 0.001,
+        decel_rate: float = 0.0005,
+        initial_capital: float = 10000,
+        macro_df: Optional[pd.DataFrame] = None
+    ):
+        self.sink = sink
+        self.params = dict(
+            alpha=alpha, beta=beta, threshold=threshold,
+            decel_rate=decel_rate, initial_capital=initial_capital,
+            use_macro=macro_df is not None
+        )
+        # Matches run_strategy's join + ffill: a macro value applies from the
+        # first bar stamped with its date onwards
+        self.macro = {} if macro_df is None else macro_df['Macro_Signal'].to_dict()
+        self.macro_state = {}
+        self.instruments = {}
+        self.latency = LatencyHistogram()
+        self.compute_latency = LatencyHistogram()
+
+    def state(self, ticker: str) -> IncrementalStrategy:
+        state = self.instruments.get(ticker)
+        if state is None:
+            state = self.instruments[ticker] = IncrementalStrategy(**self.params)
+            self.macro_state[ticker] = math.nan
+        return state
+
+    async def on_bar(self, bar: Bar):
+        """Processes one bar: update state, decide, then emit any orders."""
+        started_ns = time.perf_counter_ns()
+        state = self.state(bar.ticker)
+        macro_signal = self.macro_state[bar.ticker]
+        if self.macro:
+            macro_signal = self.macro.get(bar.timestamp, macro_signal)
+            self.macro_state[bar.ticker] = macro_signal
+
+        actions = state.update(bar.close, macro_signal)
+        decided_ns = time.perf_counter_ns()
+        self.latency.record(max(0, decided_ns - bar.received_ns))
+        self.compute_latency.record(decided_ns - started_ns)
+
+        for action in actions:
+            await self.sink.submit(Order(
+                bar.ticker, bar.timestamp, action, bar.close, state.position
+            ))
+
+    async def consume(self, feed):
+        async for bar in feed:
+            await self.on_bar(bar)
+
+    async def run(self, *feeds):
+        """Consumes all feeds concurrently until they are exhausted."""
+        await asyncio.gather(*(self.consume(feed) for feed in feeds))
+
+    def positions(self) -> pd.DataFrame:
+        """Current position, entry price and equity per instrument."""
+        return pd.DataFrame({
+            ticker: {
+                'Position': s.position,
+                'Entry_Price': s.entry_price,
+                'Equity': s.equity,
+                'Trades': len(s.trade_log),
+            }
+            for ticker, s in self.instruments.items()
+        }).T
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Paper trade the strategy on cached bars.")
+    parser.add_argument("tickers", nargs="+", help="Tickers to replay from the price cache")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay speed (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=0.00015)
+    parser.add_argument("--decel-rate", type=float, default=0.0005)
+    parser.add_argument("--print-orders", action="store_true")
+    args = parser.parse_args(argv)
+
+    feed = ReplayFeed.from_cache(
+        args.tickers, interval=args.interval, cache_dir=args.cache_dir,
+        start=args.start, end=args.end, speed=args.speed
+    )
+    sink = PrintSink() if args.print_orders else ListSink()
+    engine = PaperTradingEngine(
+        sink, args.alpha, args.beta,
+        threshold=args.threshold, decel_rate=args.decel_rate
+    )
+
+    print(f"Replaying {len(feed)} bars for {len(args.tickers)} instruments...")
+    started = time.perf_counter()
+    asyncio.run(engine.run(feed))
+    elapsed = time.perf_counter() - started
+
+    print(f"Done in {elapsed:.2f}s ({len(feed) / max(elapsed, 1e-9):,.0f} bars/s)")
+    print("Tick-to-decision latency (including queueing):")
+    for key, value in engine.latency.summary().items():
+        print(f"  {key:<9} {value:,.2f}")
+    print("Strategy update latency:")
+    for key, value in engine.compute_latency.summary().items():
+        print(f"  {key:<9} {value:,.2f}")
+    print(engine.positions())
+
+
+if __name__ == "__main__":
+    main()
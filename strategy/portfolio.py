@@ -0,0 +1,288 @@
+"""
+Portfolio Simulation Module
+===========================
+Functions for running the strategy on a basket of pairs from one capital pool.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+
+from strategy.metrics import calculate_metrics
+
+
+def _align_closes(prices: Union[pd.DataFrame, Dict[str, pd.DataFrame]]) -> pd.DataFrame:
+    """
+    Puts every pair on a common time axis as a (time x pairs) close matrix.
+
+    Accepts either a wide DataFrame of closes (one column per pair) or a dict
+    mapping pair names to DataFrames with a 'Close' column, as returned by
+    get_price_data. Gaps are forward-filled so a pair that does not print on
+    a bar simply has a zero return for that bar.
+    """
+    if isinstance(prices, dict):
+        closes = pd.concat(
+            {name: frame['Close'].squeeze() for name, frame in prices.items()},
+            axis=1
+        )
+    else:
+        closes = prices.copy()
+
+    closes = closes.sort_index().ffill()
+    return closes.astype(float)
+
+
+def _last_index(mask: np.ndarray) -> np.ndarray:
+    """
+    For every (bar, pair), the index of the most recent bar at or before it
+    where mask was True (-1 if never).
+    """
+    n = mask.shape[0]
+    idx = np.where(mask, np.arange(n)[:, None], -1)
+    return np.maximum.accumulate(idx, axis=0)
+
+
+def compute_positions(
+    closes: pd.DataFrame,
+    alpha: float,
+    beta: float,
+    threshold: float = 0.001,
+    decel_rate: float = 0.0005,
+    macro_df: Optional[pd.DataFrame] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Replays the run_strategy entry and exit rules for many pairs at once.
+
+    The position state machine is resolved without a per-bar loop: a pair is
+    long (short) at a bar if its most recent entry was long (short) and no
+    long (short) exit condition has fired since that entry.
+
+    Parameters:
+    -----------
+    closes : pd.DataFrame
+        Close prices, one column per pair, on a common time axis
+    alpha : float
+        Slow exponential smoothing parameter
+    beta : float
+        Fast exponential smoothing parameter
+    threshold : float
+        Crossover threshold for entry signals
+    decel_rate : float
+        Deceleration rate for exit signals
+    macro_df : pd.DataFrame, optional
+        Macroeconomic signals DataFrame with 'Macro_Signal' column
+
+    Returns:
+    --------
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        (positions, long_entry, short_entry, exits), each shaped (time x pairs).
+        exits flags bars where the exit condition for the held side fired.
+    """
+    es_slow = closes.ewm(alpha=alpha, adjust=False).mean()
+    es_fast = closes.ewm(alpha=beta, adjust=False).mean()
+    diff = (es_fast - es_slow).to_numpy()
+    accel = es_fast.diff().diff().to_numpy()
+
+    prev_diff = np.empty_like(diff)
+    prev_diff[0] = np.nan
+    prev_diff[1:] = diff[:-1]
+
+    long_entry = (prev_diff < 0) & (diff > threshold)
+    short_entry = (prev_diff > 0) & (diff < -threshold)
+
+    if macro_df is not None:
+        macro = (
+            macro_df['Macro_Signal']
+            .reindex(closes.index)
+            .ffill()
+            .to_numpy()[:, None]
+        )
+        long_entry &= macro > 0
+        short_entry &= macro < 0
+
+    exit_long = accel < -decel_rate
+    exit_short = accel > decel_rate
+
+    # The trading loop starts at the third bar
+    for mask in (long_entry, short_entry, exit_long, exit_short):
+        mask[:2] = False
+
+    last_long = _last_index(long_entry)
+    last_short = _last_index(short_entry)
+    last_exit_long = _last_index(exit_long)
+    last_exit_short = _last_index(exit_short)
+
+    is_long = (last_long > last_short) & (last_exit_long <= last_long)
+    is_short = (last_short > last_long) & (last_exit_short <= last_short)
+    positions = is_long.astype(np.int8) - is_short.astype(np.int8)
+
+    prev_pos = np.zeros_like(positions)
+    prev_pos[1:] = positions[:-1]
+    exits = ((prev_pos == 1) & exit_long) | ((prev_pos == -1) & exit_short)
+
+    return positions, long_entry, short_entry, exits
+
+
+def _allocation_weights(positions: np.ndarray, allocation: str) -> np.ndarray:
+    """
+    Fraction of portfolio equity assigned to each pair for the next bar.
+    """
+    n_pairs = positions.shape[1]
+    if allocation == 'equal':
+        return np.full(positions.shape, 1.0 / n_pairs)
+    if allocation == 'active':
+        active = positions != 0
+        n_active = active.sum(axis=1, keepdims=True)
+        return np.where(active, 1.0 / np.maximum(n_active, 1), 0.0)
+    raise ValueError(f"Unknown allocation '{allocation}' (expected 'equal' or 'active')")
+
+
+def _split_pair(name: str) -> Optional[Tuple[str, str]]:
+    """
+    Splits a yfinance FX ticker such as 'EURUSD=X' into ('EUR', 'USD').
+    """
+    code = name.split('=')[0].upper()
+    if len(code) != 6 or not code.isalpha():
+        return None
+    return code[:3], code[3:]
+
+
+def _net_currency_exposure(notional: pd.DataFrame) -> pd.DataFrame:
+    """
+    Nets pair notionals into per-currency exposures.
+
+    A long position of N in BASE/QUOTE is +N in the base currency and -N in
+    the quote currency. Pairs whose names do not parse are left out.
+    """
+    legs = {}
+    for name in notional.columns:
+        split = _split_pair(str(name))
+        if split is None:
+            continue
+        base, quote = split
+        legs.setdefault(base, []).append((name, 1.0))
+        legs.setdefault(quote, []).append((name, -1.0))
+
+    exposure = pd.DataFrame(index=notional.index)
+    for currency, members in sorted(legs.items()):
+        names = [name for name, _ in members]
+        signs = np.array([sign for _, sign in members])
+        exposure[currency] = notional[names].to_numpy() @ signs
+    return exposure
+
+
+def run_portfolio(
+    prices: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+    alpha: float,
+    beta: float,
+    threshold: float = 0.001,
+    decel_rate: float = 0.0005,
+    initial_capital: float = 10000,
+    macro_df: Optional[pd.DataFrame] = None,
+    allocation: str = 'equal'
+) -> Tuple[Dict[str, float], pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Runs the strategy on a basket of pairs that share one capital pool.
+
+    Every pair follows the same entry and exit rules as run_strategy. The
+    simulation is computed as (time x pairs) array operations, so its cost
+    grows with the size of the data rather than with Python-level loops.
+
+    Parameters:
+    -----------
+    prices : pd.DataFrame or dict
+        Wide DataFrame of closes (one column per pair) or a dict of
+        {pair: DataFrame with 'Close' column}
+    alpha : float
+        Slow exponential smoothing parameter
+    beta : float
+        Fast exponential smoothing parameter
+    threshold : float
+        Crossover threshold for entry signals
+    decel_rate : float
+        Deceleration rate for exit signals
+    initial_capital : float
+        Starting capital of the shared pool
+    macro_df : pd.DataFrame, optional
+        Macroeconomic signals DataFrame with 'Macro_Signal' column
+    allocation : str
+        'equal' gives every pair a fixed 1/N share of equity (idle shares
+        stay in cash); 'active' splits all equity across the pairs that hold
+        a position
+
+    Returns:
+    --------
+    Tuple[Dict, pd.DataFrame, pd.DataFrame, pd.DataFrame]
+        (metrics, portfolio_df, positions_df, trades_df)
+        portfolio_df holds 'Equity', 'Gross_Exposure', 'Active_Pairs' and
+        one net exposure column per currency. trades_df holds one row per
+        closed trade with its 'pnl' in account currency.
+    """
+    closes = _align_closes(prices)
+    pairs = closes.columns
+    n_bars = len(closes)
+
+    positions, long_entry, short_entry, exits = compute_positions(
+        closes, alpha, beta,
+        threshold=threshold,
+        decel_rate=decel_rate,
+        macro_df=macro_df
+    )
+
+    # Capital allocation is decided on the previous bar's positions
+    weights = _allocation_weights(positions, allocation)
+
+    close_values = closes.to_numpy()
+    returns = np.zeros_like(close_values)
+    returns[1:] = close_values[1:] / close_values[:-1] - 1
+    returns = np.nan_to_num(returns)
+
+    exposure = np.zeros_like(returns)
+    exposure[1:] = weights[:-1] * positions[:-1]
+    bar_contrib = exposure * returns
+
+    portfolio_returns = bar_contrib.sum(axis=1)
+    equity = initial_capital * np.cumprod(1 + portfolio_returns)
+
+    prev_equity = np.empty(n_bars)
+    prev_equity[0] = initial_capital
+    prev_equity[1:] = equity[:-1]
+    pnl = bar_contrib * prev_equity[:, None]
+    cum_pnl = np.cumsum(pnl, axis=0)
+
+    # A trade closes on an exit or on a reversal into the opposite side
+    prev_pos = np.zeros_like(positions)
+    prev_pos[1:] = positions[:-1]
+    reversal = ((prev_pos == 1) & short_entry) | ((prev_pos == -1) & long_entry)
+    closed = exits | reversal
+
+    entry_idx = _last_index(long_entry | short_entry)
+    bar_idx, pair_idx = np.nonzero(closed)
+    open_idx = entry_idx[bar_idx - 1, pair_idx]
+
+    trades_df = pd.DataFrame({
+        'Pair': pairs[pair_idx],
+        'Side': np.where(prev_pos[bar_idx, pair_idx] == 1, 'Long', 'Short'),
+        'Entry_Date': closes.index[open_idx],
+        'Exit_Date': closes.index[bar_idx],
+        'Entry_Price': close_values[open_idx, pair_idx],
+        'Exit_Price': close_values[bar_idx, pair_idx],
+        'pnl': cum_pnl[bar_idx, pair_idx] - cum_pnl[open_idx, pair_idx]
+    }).sort_values(['Exit_Date', 'Pair'], ignore_index=True)
+
+    positions_df = pd.DataFrame(positions, index=closes.index, columns=pairs)
+    notional = pd.DataFrame(
+        equity[:, None] * weights * positions, index=closes.index, columns=pairs
+    )
+
+    portfolio_df = pd.DataFrame({
+        'Equity': equity,
+        'Gross_Exposure': notional.abs().sum(axis=1).to_numpy(),
+        'Active_Pairs': (positions != 0).sum(axis=1)
+    }, index=closes.index)
+    portfolio_df = portfolio_df.join(_net_currency_exposure(notional))
+
+    trade_log = trades_df if not trades_df.empty else [0]
+    metrics = calculate_metrics(portfolio_df['Equity'], trade_log)
+
+    return metrics, portfolio_df, positions_df, trades_df
@@ -0,0 +1,164 @@
+"""
+Pruning Module
+==============
+Early-abort rules for parameter sweeps.
+
+A PruningPolicy is checked every `every` bars while run_strategy simulates
+a parameter combination. When one of its rules fires, the simulation
+stops and the cell is reported as pruned instead of being run to the end
+of the history.
+
+Drawdown and trade-count rules are exact: both quantities only grow, so a
+run that breaks the limit part-way would break it at the end too. The
+Sharpe bound is a heuristic: it drops cells whose interim Sharpe trails
+the best completed cell of the sweep by more than a margin.
+
+Usage:
+    policy = PruningPolicy(max_drawdown=0.25, max_trades=2000, sharpe_margin=1.0)
+    heatmap_data, best_params = perform_grid_search(data, 0.00015, 0.0005, pruning=policy)
+    heatmap_data.attrs['pruned']  # reason per cell ('' = ran to the end)
+"""
+
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class Checkpoint(NamedTuple):
+    """State of a run at a checkpoint, as seen by the rules."""
+    bar: int            # index of the last simulated bar
+    n_bars: int         # bars in the full history
+    n_trades: int       # closed trades so far (as in 'Total Trades')
+    max_drawdown: float  # worst drawdown so far (0 or negative)
+    sharpe: float       # Sharpe ratio so far, annualized like calculate_metrics
+    best_sharpe: float  # best final Sharpe of the sweep so far (-inf if none)
+
+
+Rule = Callable[[Checkpoint], Optional[str]]
+
+
+def max_drawdown_rule(limit: float) -> Rule:
+    """Prune once the drawdown is deeper than `limit` (e.g. 0.25 for -25%)."""
+    def rule(cp: Checkpoint) -> Optional[str]:
+        if cp.max_drawdown < -limit:
+            return f"drawdown {cp.max_drawdown:.1%}"
+        return None
+    return rule
+
+
+def max_trades_rule(limit: int) -> Rule:
+    """Prune once more than `limit` trades have closed."""
+    def rule(cp: Checkpoint) -> Optional[str]:
+        if cp.n_trades > limit:
+            return f"{cp.n_trades} trades"
+        return None
+    return rule
+
+
+def sharpe_bound_rule(margin: float, min_fraction: float = 0.25) -> Rule:
+    """
+    Prune when the interim Sharpe is more than `margin` below the best
+    completed cell, once at least `min_fraction` of the history has run.
+    """
+    def rule(cp: Checkpoint) -> Optional[str]:
+        if (cp.bar + 1) / cp.n_bars >= min_fraction and cp.sharpe < cp.best_sharpe - margin:
+            return f"sharpe {cp.sharpe:.2f} < best {cp.best_sharpe:.2f} - {margin:g}"
+        return None
+    return rule
+
+
+class PruningPolicy:
+    """
+    Abort rules for run_strategy and perform_grid_search.
+
+    Parameters:
+    -----------
+    max_drawdown : float, optional
+        Prune at a drawdown deeper than this fraction
+    max_trades : int, optional
+        Prune after this many closed trades
+    sharpe_margin : float, optional
+        Prune when the interim Sharpe trails the sweep's best by this much
+    min_fraction : float
+        Share of the history to simulate before the Sharpe bound applies
+    rules : sequence of callables, optional
+        Extra rules: rule(Checkpoint) -> reason string, or None to continue
+    every : int
+        Bars between checkpoints
+    """
+
+    def __init__(
+        self,
+        max_drawdown: Optional[float] = None,
+        max_trades: Optional[int] = None,
+        sharpe_margin: Optional[float] = None,
+        min_fraction: float = 0.25,
+        rules: Sequence[Rule] = (),
+        every: int = 250
+    ):
+        self.rules: List[Rule] = []
+        if max_drawdown is not None:
+            self.rules.append(max_drawdown_rule(max_drawdown))
+        if max_trades is not None:
+            self.rules.append(max_trades_rule(max_trades))
+        if sharpe_margin is not None:
+            self.rules.append(sharpe_bound_rule(sharpe_margin, min_fraction))
+        self.rules.extend(rules)
+        self.every = every
+        # Set by perform_grid_search as cells complete
+        self.best_sharpe = -np.inf
+
+    def tracker(self, n_bars: int) -> "PruningTracker":
+        """Fresh checkpoint state for one run over `n_bars` bars."""
+        return PruningTracker(self, n_bars)
+
+
+class PruningTracker:
+    """
+    Running drawdown and return moments of one run. Each check only reads
+    the equity added since the previous checkpoint.
+    """
+
+    __slots__ = ('policy', 'n_bars', 'next_check', 'last', 'peak', 'max_drawdown', 'n', 's1', 's2')
+
+    def __init__(self, policy: PruningPolicy, n_bars: int):
+        self.policy = policy
+        self.n_bars = n_bars
+        self.next_check = policy.every
+        self.last = 0
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+        self.n = 0
+        self.s1 = 0.0
+        self.s2 = 0.0
+
+    def check(self, equity: list, i: int, n_trades: int) -> Optional[str]:
+        """
+        Updates the state with equity[:i + 1] and returns the first rule's
+        reason to stop, or None.
+        """
+        self.next_check = i + self.policy.every
+        segment = np.asarray(equity[self.last:i + 1], dtype=float)
+        self.last = i
+
+        peaks = np.maximum(np.maximum.accumulate(segment), self.peak)
+        self.peak = peaks[-1]
+        self.max_drawdown = min(self.max_drawdown, float((segment / peaks - 1).min()))
+
+        returns = segment[1:] / segment[:-1] - 1
+        self.n += len(returns)
+        self.s1 += returns.sum()
+        self.s2 += (returns * returns).sum()
+
+        sharpe = 0.0
+        if self.n > 1:
+            std = np.sqrt(max((self.s2 - self.s1 * self.s1 / self.n) / (self.n - 1), 0.0))
+            if std > 0:
+                sharpe = self.s1 / self.n / std * np.sqrt(252)
+
+        cp = Checkpoint(i, self.n_bars, n_trades, self.max_drawdown, sharpe, self.policy.best_sharpe)
+        for rule in self.policy.rules:
+            reason = rule(cp)
+            if reason:
+                return reason
+        return None
@@ -0,0 +1,288 @@
+"""
+Sweep Results Module
+====================
+Columnar storage for parameter sweeps.
+
+SweepResultsWriter streams one row per evaluation (parameters + metrics)
+into an Arrow IPC stream in fixed-size chunks while the sweep runs, and
+can stream each evaluation's equity curve into a second file. SweepResults
+memory-maps those files, so filtering and heatmap slicing only page in the
+columns they touch, even for sweeps with tens of millions of rows. Every
+chunk is readable as soon as it is written: a sweep that is still running,
+or was killed, can be opened and shows the rows flushed so far.
+
+Usage:
+    with SweepResultsWriter("sweeps/eurusd", write_equity=True) as writer:
+        for threshold in thresholds:
+            for decel_rate in decel_rates:
+                perform_grid_search(data, threshold, decel_rate, results_writer=writer)
+
+    results = SweepResults("sweeps/eurusd")
+    heatmap = results.heatmap(threshold=0.00015, decel_rate=0.0005)
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+RESULTS_FILE = "results.arrow"
+EQUITY_FILE = "equity.arrow"
+
+
+class _ChunkedArrowFile:
+    """Buffers rows column-wise and writes them as Arrow record batches."""
+
+    def __init__(self, path: str, chunk_size: int):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.columns = {}
+        self.n_buffered = 0
+        self.schema = None
+        self.writer = None
+
+    def append_row(self, row: Dict[str, float]):
+        for name, value in row.items():
+            self.columns.setdefault(name, []).append(value)
+        self.n_buffered += 1
+        if self.n_buffered >= self.chunk_size:
+            self.flush()
+
+    def append_columns(self, columns: Dict[str, np.ndarray], n_rows: int):
+        for name, values in columns.items():
+            self.columns.setdefault(name, []).append(values)
+        self.n_buffered += n_rows
+        if self.n_buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.n_buffered == 0:
+            return
+        arrays = {
+            name: np.concatenate(chunks) if isinstance(chunks[0], np.ndarray) else np.asarray(chunks)
+            for name, chunks in self.columns.items()
+        }
+        if self.schema is None:
+            batch = pa.RecordBatch.from_pydict(arrays)
+            self.schema = batch.schema
+            # The stream format has no footer, so written chunks are readable
+            # before close() (and after a crash)
+            self.writer = pa.ipc.new_stream(self.path, self.schema)
+        else:
+            batch = pa.RecordBatch.from_pydict(arrays, schema=self.schema)
+        self.writer.write_batch(batch)
+        self.columns = {}
+        self.n_buffered = 0
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class SweepResultsWriter:
+    """
+    Append-only writer for sweep results.
+
+    Parameters:
+    -----------
+    path : str
+        Output directory (created if missing)
+    chunk_size : int
+        Rows per Arrow record batch in the results file
+    write_equity : bool
+        Also store every evaluation's equity curve (in equity.arrow, with
+        timezone-aware dates stored as naive UTC)
+    overwrite : bool
+        Replace existing results instead of raising FileExistsError
+    """
+
+    def __init__(self, path: str, chunk_size: int = 65536, write_equity: bool = False, overwrite: bool = False):
+        os.makedirs(path, exist_ok=True)
+        results_path = os.path.join(path, RESULTS_FILE)
+        equity_path = os.path.join(path, EQUITY_FILE)
+        if not overwrite and os.path.exists(results_path):
+            raise FileExistsError(f"{results_path} already exists (pass overwrite=True to replace it)")
+        for stale in (results_path, equity_path):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+        self.path = path
+        self.write_equity = write_equity
+        self.n_rows = 0
+        self._results = _ChunkedArrowFile(results_path, chunk_size)
+        # Equity rows are far more numerous; chunk them by a larger row count
+        self._equity = _ChunkedArrowFile(equity_path, chunk_size * 16) if write_equity else None
+
+    def append(self, params: Dict[str, float], metrics: Dict[str, float], equity: Optional[pd.Series] = None) -> int:
+        """
+        Records one evaluation and returns its run_id.
+
+        Every call must pass the same parameter and metric names. Values are
+        stored as float64, except strings (e.g. a ticker), which stay strings.
+        """
+        run_id = self.n_rows
+        row = {'run_id': run_id}
+        for name, value in {**params, **metrics}.items():
+            row[name] = value if isinstance(value, str) else float(value)
+        self._results.append_row(row)
+
+        if self._equity is not None and equity is not None:
+            n = len(equity)
+            dates = equity.index
+            if getattr(dates, 'tz', None) is not None:
+                dates = dates.tz_convert('UTC').tz_localize(None)
+            self._equity.append_columns({
+                'run_id': np.full(n, run_id, dtype=np.int64),
+                'Date': dates.to_numpy(),
+                'Equity': equity.to_numpy(dtype=np.float64),
+            }, n)
+
+        self.n_rows += 1
+        return run_id
+
+    def close(self):
+        self._results.close()
+        if self._equity is not None:
+            self._equity.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _open_mapped(path: str) -> pa.Table:
+    """
+    Zero-copy table over a memory-mapped Arrow IPC stream, made of the
+    record batches written completely so far.
+    """
+    source = pa.memory_map(path, 'r')
+    reader = pa.ipc.open_stream(source)
+    batches = []
+    while True:
+        try:
+            batches.append(reader.read_next_batch())
+        except StopIteration:
+            break
+        except (pa.ArrowInvalid, OSError):
+            # Last batch cut short by a crash or still being written
+            break
+    return pa.Table.from_batches(batches, schema=reader.schema)
+
+
+class SweepResults:
+    """
+    Memory-mapped reader for a directory written by SweepResultsWriter.
+
+    Parameters:
+    -----------
+    path : str
+        Directory containing results.arrow (and optionally equity.arrow)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.table = _open_mapped(os.path.join(path, RESULTS_FILE))
+        self._equity_table = None
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return self.table.column_names
+
+    def _mask(self, table: pa.Table, conditions: Dict[str, object]):
+        mask = None
+        for name, value in conditions.items():
+            column = table.column(name)
+            if isinstance(value, tuple) and len(value) == 2:
+                low, high = value
+                cond = pc.and_(pc.greater_equal(column, low), pc.less_equal(column, high))
+            elif isinstance(value, (list, set)):
+                cond = pc.is_in(column, value_set=pa.array(list(value), type=column.type))
+            elif isinstance(value, float):
+                # Swept values come from np.arange, so compare with a tolerance
+                cond = pc.less_equal(pc.abs(pc.subtract(column, value)), 1e-9)
+            else:
+                cond = pc.equal(column, value)
+            mask = cond if mask is None else pc.and_(mask, cond)
+        return mask
+
+    def filter(self, columns: Optional[List[str]] = None, **conditions) -> pd.DataFrame:
+        """
+        Returns matching rows as a DataFrame.
+
+        Conditions are column=value (floats compared with a small tolerance),
+        column=(low, high) for an inclusive range, or column=[v1, v2, ...].
+        Only the requested columns are materialized.
+
+        Example:
+            results.filter(threshold=0.00015, **{'Sharpe Ratio': (1.0, np.inf)})
+        """
+        table = self.table
+        mask = self._mask(table, conditions)
+        if columns is not None:
+            table = table.select(columns)
+        if mask is not None:
+            table = table.filter(mask)
+        return table.to_pandas()
+
+    def heatmap(
+        self,
+        index: str = 'alpha',
+        columns: str = 'beta',
+        values: str = 'Sharpe Ratio',
+        decimals: int = 2,
+        **fixed
+    ) -> pd.DataFrame:
+        """
+        Slices a 2D heatmap out of the sweep, in the shape perform_grid_search
+        returns as heatmap_data.
+
+        The remaining sweep dimensions must be pinned with keyword arguments,
+        e.g. heatmap(threshold=0.00015, decel_rate=0.0005).
+        """
+        df = self.filter(columns=[index, columns, values], **fixed)
+        df[index] = df[index].round(decimals)
+        df[columns] = df[columns].round(decimals)
+        return df.pivot_table(index=index, columns=columns, values=values, aggfunc='max')
+
+    def best(self, metric: str = 'Sharpe Ratio', **fixed) -> Dict[str, float]:
+        """The row with the highest `metric` among rows matching `fixed`."""
+        table = self.table
+        mask = self._mask(table, fixed)
+        if mask is not None:
+            table = table.filter(mask)
+        if table.num_rows == 0:
+            return {}
+        scores = table.column(metric).to_numpy(zero_copy_only=False)
+        i = int(np.nanargmax(scores)) if not np.all(np.isnan(scores)) else 0
+        return {name: table.column(name)[i].as_py() for name in table.column_names}
+
+    def equity_matrix(self, run_ids: Optional[List[int]] = None) -> pd.DataFrame:
+        """
+        Equity curves as a (time x run_id) matrix, ready for the batched
+        functions in strategy.rolling.
+        """
+        if self._equity_table is None:
+            self._equity_table = _open_mapped(os.path.join(self.path, EQUITY_FILE))
+        table = self._equity_table
+        if run_ids is not None:
+            table = table.filter(pc.is_in(table.column('run_id'), value_set=pa.array(run_ids, type=pa.int64())))
+        df = table.to_pandas()
+        return df.pivot(index='Date', columns='run_id', values='Equity')
+
+    def equity(self, run_id: int) -> pd.Series:
+        """Equity curve of one evaluation (requires write_equity=True)."""
+        if self._equity_table is None:
+            self._equity_table = _open_mapped(os.path.join(self.path, EQUITY_FILE))
+        table = self._equity_table.filter(pc.equal(self._equity_table.column('run_id'), run_id))
+        df = table.select(['Date', 'Equity']).to_pandas()
+        return df.set_index('Date')['Equity']
@@ -0,0 +1,309 @@
+"""
+Rolling Analytics Module
+========================
+O(n) rolling performance metrics for equity curves.
+
+All batch functions accept a pd.Series, a pd.DataFrame (time x runs, e.g.
+the equity matrix of a sweep) or a numpy array, and return the same type.
+The first bars, where the window is not yet full, are NaN, and so is any
+window holding a NaN equity value (e.g. a curve that ends early in a
+NaN-padded equity matrix, or a pruned run).
+
+- Sharpe, volatility and hit rate use prefix sums, so each window costs
+  O(1) no matter how long it is.
+- Max drawdown uses the associative (peak, trough, worst drawdown)
+  aggregate. Batch mode evaluates it with block prefix/suffix scans, the
+  array form of a sliding-window queue; RollingAnalytics keeps a two-stack
+  queue for O(1) amortized live updates.
+"""
+
+from collections import deque
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[pd.Series, pd.DataFrame, np.ndarray]
+
+
+def _as_2d(values: ArrayLike) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    return arr[:, None] if arr.ndim == 1 else arr
+
+
+def _wrap(result: np.ndarray, like: ArrayLike) -> ArrayLike:
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(result, index=like.index, columns=like.columns)
+    if isinstance(like, pd.Series):
+        return pd.Series(result[:, 0], index=like.index, name=like.name)
+    return result[:, 0] if np.ndim(like) == 1 else result
+
+
+def _returns(equity: np.ndarray) -> np.ndarray:
+    returns = np.full_like(equity, np.nan)
+    returns[1:] = equity[1:] / equity[:-1] - 1
+    return returns
+
+
+def _window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sums over `window` rows via one prefix sum (NaN until full)."""
+    csum = np.zeros((values.shape[0] + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=csum[1:])
+    out = np.full(values.shape, np.nan)
+    out[window - 1:] = csum[window:] - csum[:-window]
+    return out
+
+
+def _window_complete(returns: np.ndarray, window: int) -> np.ndarray:
+    """Whether each trailing window holds `window` valid returns."""
+    return _window_sum(~np.isnan(returns), window) == window
+
+
+def _window_moments(returns: np.ndarray, window: int):
+    """Rolling mean and sample variance of the last `window` returns."""
+    # Centre each column first to limit cancellation in sum(x^2) - sum(x)^2 / n
+    valid = np.nan_to_num(returns)
+    centre = np.nanmean(returns, axis=0) if len(returns) > 1 else np.zeros(returns.shape[1])
+    centred = np.where(np.isnan(returns), 0.0, valid - centre)
+
+    s1 = _window_sum(centred, window)
+    s2 = _window_sum(centred ** 2, window)
+    mean = s1 / window + centre
+    var = (s2 - s1 ** 2 / window) / (window - 1)
+
+    # Flat windows (no position) would come out as rounding noise, so detect
+    # them exactly: no return in the window differs from the one before it
+    changed = np.zeros(returns.shape)
+    changed[1:] = valid[1:] != valid[:-1]
+    n_changes = _window_sum(changed, window - 1) if window > 1 else np.zeros(returns.shape)
+    var[n_changes == 0] = 0.0
+    var = np.maximum(var, 0.0)
+
+    # Missing returns are zeros in the sums above: mask windows holding any.
+    # The first return is undefined, so the first full window ends one bar later
+    complete = _window_complete(returns, window)
+    mean[~complete] = np.nan
+    var[~complete] = np.nan
+    return mean, var
+
+
+def rolling_volatility(equity: ArrayLike, window: int, periods_per_year: int = 252) -> ArrayLike:
+    """
+    Annualized volatility of the last `window` bar returns.
+
+    Parameters:
+    -----------
+    equity : pd.Series, pd.DataFrame or np.ndarray
+        Equity curve(s), time along the first axis
+    window : int
+        Number of returns per window
+    periods_per_year : int
+        Bars per year used for annualization (252 daily, ~6240 hourly FX)
+    """
+    _, var = _window_moments(_returns(_as_2d(equity)), window)
+    return _wrap(np.sqrt(var) * np.sqrt(periods_per_year), equity)
+
+
+def rolling_sharpe(equity: ArrayLike, window: int, periods_per_year: int = 252) -> ArrayLike:
+    """
+    Annualized Sharpe ratio of the last `window` bar returns, with the same
+    definition as calculate_metrics (0 when the window has no volatility).
+    """
+    mean, var = _window_moments(_returns(_as_2d(equity)), window)
+    std = np.sqrt(var)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+    sharpe[np.isnan(var)] = np.nan
+    return _wrap(sharpe, equity)
+
+
+def rolling_hit_rate(equity: ArrayLike, window: int) -> ArrayLike:
+    """
+    Share of winning bars among bars with a non-zero return, over the last
+    `window` returns (NaN when the strategy was flat the whole window).
+    """
+    returns = _returns(_as_2d(equity))
+    wins = _window_sum(np.nan_to_num(returns) > 0, window)
+    active = _window_sum(np.nan_to_num(returns) != 0, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hit_rate = np.where(active > 0, wins / active, np.nan)
+    hit_rate[~_window_complete(returns, window)] = np.nan
+    return _wrap(hit_rate, equity)
+
+
+def rolling_max_drawdown(equity: ArrayLike, window: int) -> ArrayLike:
+    """
+    Worst peak-to-trough drawdown inside each trailing window of `window`
+    equity values (0 or negative, like calculate_metrics' Max Drawdown).
+
+    The window is split into whole blocks of `window` rows. A window then
+    covers the suffix of one block and the prefix of the next, so it is the
+    combination of two precomputed scans:
+
+        combine(A, B).mdd = min(A.mdd, B.mdd, B.min / A.max - 1)
+    """
+    values = _as_2d(equity)
+    n, m = values.shape
+    out = np.full((n, m), np.nan)
+    if window > n:
+        return _wrap(out, equity)
+
+    n_blocks = -(-n // window)
+    padded = np.empty((n_blocks * window, m))
+    padded[:n] = values
+    padded[n:] = values[-1]  # padding only ever lands in unused suffixes
+    blocks = padded.reshape(n_blocks, window, m)
+
+    # Prefix scans inside each block
+    pre_max = np.maximum.accumulate(blocks, axis=1)
+    pre_min = np.minimum.accumulate(blocks, axis=1)
+    pre_mdd = np.minimum.accumulate(blocks / pre_max - 1, axis=1)
+
+    # Suffix scans inside each block
+    rev = blocks[:, ::-1]
+    suf_max = np.maximum.accumulate(rev, axis=1)[:, ::-1]
+    suf_min = np.minimum.accumulate(rev, axis=1)[:, ::-1]
+    # Drawdown that starts at row i: worst later trough against value i
+    later_min = np.empty_like(suf_min)
+    later_min[:, :-1] = suf_min[:, 1:]
+    later_min[:, -1] = np.inf
+    start_dd = np.minimum(later_min / blocks - 1, 0.0)
+    suf_mdd = np.minimum.accumulate(start_dd[:, ::-1], axis=1)[:, ::-1]
+
+    pre_max, pre_min, pre_mdd = (a.reshape(-1, m)[:n] for a in (pre_max, pre_min, pre_mdd))
+    suf_max, suf_mdd = (a.reshape(-1, m)[:n] for a in (suf_max, suf_mdd))
+
+    end = np.arange(window - 1, n)
+    start = end - window + 1
+    aligned = start % window == 0
+    combined = np.minimum(
+        np.minimum(suf_mdd[start], pre_mdd[end]),
+        pre_min[end] / suf_max[start] - 1
+    )
+    # A window that starts on a block boundary is exactly one block
+    out[window - 1:] = np.where(aligned[:, None], pre_mdd[end], combined)
+    return _wrap(out, equity)
+
+
+def rolling_metrics(equity: pd.Series, window: int, periods_per_year: int = 252) -> pd.DataFrame:
+    """
+    All rolling metrics for one equity curve, as a DataFrame with columns
+    'Rolling Sharpe', 'Rolling Volatility', 'Rolling Max Drawdown' and
+    'Rolling Hit Rate'.
+    """
+    return pd.DataFrame({
+        'Rolling Sharpe': rolling_sharpe(equity, window, periods_per_year),
+        'Rolling Volatility': rolling_volatility(equity, window, periods_per_year),
+        'Rolling Max Drawdown': rolling_max_drawdown(equity, window),
+        'Rolling Hit Rate': rolling_hit_rate(equity, window),
+    }, index=equity.index)
+
+
+class RollingAnalytics:
+    """
+    Incremental rolling metrics for live equity updates.
+
+    Each update() is O(1) amortized and returns the same values the batch
+    functions give for the latest bar.
+
+    Parameters:
+    -----------
+    window : int
+        Window length in bars
+    periods_per_year : int
+        Bars per year used for annualization
+    """
+
+    def __init__(self, window: int, periods_per_year: int = 252):
+        self.window = window
+        self.periods_per_year = periods_per_year
+        self.returns = deque()
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.changes = deque()
+        self.n_changes = 0
+        self.wins = 0
+        self.active = 0
+        self.n_updates = 0
+        self.last_equity = None
+        # Two-stack queue of (value, max, min, mdd) aggregates over equity
+        self.front = []
+        self.back = []
+        self.back_agg = None
+
+    @staticmethod
+    def _combine(a, b):
+        # a precedes b in time
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return (max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2], b[1] / a[0] - 1))
+
+    def _push_equity(self, value: float):
+        item = (value, value, 0.0)
+        self.back.append(item)
+        self.back_agg = self._combine(self.back_agg, item)
+        if len(self.front) + len(self.back) > self.window:
+            if not self.front:
+                # Move back to front, storing suffix aggregates
+                agg = None
+                while self.back:
+                    agg = self._combine(self.back.pop(), agg)
+                    self.front.append(agg)
+                self.back_agg = None
+            self.front.pop()
+
+    def _max_drawdown(self) -> float:
+        front = self.front[-1] if self.front else None
+        return self._combine(front, self.back_agg)[2]
+
+    def update(self, equity: float) -> Dict[str, float]:
+        """
+        Adds the latest equity value and returns the current rolling metrics.
+        """
+        self.n_updates += 1
+        self._push_equity(equity)
+
+        if self.last_equity is not None:
+            r = equity / self.last_equity - 1
+            if self.returns:
+                change = r != self.returns[-1]
+                self.changes.append(change)
+                self.n_changes += change
+                if len(self.changes) > self.window - 1:
+                    self.n_changes -= self.changes.popleft()
+            self.returns.append(r)
+            self.sum += r
+            self.sum_sq += r * r
+            self.wins += r > 0
+            self.active += r != 0
+            if len(self.returns) > self.window:
+                old = self.returns.popleft()
+                self.sum -= old
+                self.sum_sq -= old * old
+                self.wins -= old > 0
+                self.active -= old != 0
+            if self.n_updates % self.window == 0:
+                # Re-sum once per window so add/subtract rounding cannot drift
+                self.sum = sum(self.returns)
+                self.sum_sq = sum(x * x for x in self.returns)
+        self.last_equity = equity
+
+        result = {
+            'Rolling Sharpe': np.nan,
+            'Rolling Volatility': np.nan,
+            'Rolling Max Drawdown': self._max_drawdown() if self.n_updates >= self.window else np.nan,
+            'Rolling Hit Rate': np.nan,
+        }
+        if len(self.returns) == self.window:
+            n = self.window
+            mean = self.sum / n
+            var = max((self.sum_sq - self.sum * self.sum / n) / (n - 1), 0.0)
+            if self.n_changes == 0:
+                var = 0.0
+            std = np.sqrt(var)
+            result['Rolling Volatility'] = std * np.sqrt(self.periods_per_year)
+            result['Rolling Sharpe'] = mean / std * np.sqrt(self.periods_per_year) if std > 0 else 0.0
+            result['Rolling Hit Rate'] = self.wins / self.active if self.active else np.nan
+        return result
@@ -18,7 +18,8 @@ def run_strategy(
     threshold: float = 0.001,
     decel_rate: float = 0.0005,
     initial_capital: float = 10000,
-    macro_df: Optional[pd.DataFrame] = None
+    macro_df: Optional[pd.DataFrame] = None,
+    pruning=None
 ) -> Tuple[Dict[str, float], pd.DataFrame, pd.DataFrame]:
     """
     Runs the trading strategy with exponential smoothing indicators.
@@ -39,6 +40,11 @@ def run_strategy(
         Starting capital
     macro_df : pd.DataFrame, optional
         Macroeconomic signals DataFrame with 'Macro_Signal' column
+    pruning : PruningPolicy, optional
+        Abort rules checked at checkpoints (see strategy.pruning). When one
+        fires, the run stops there and strategy_df ends at that bar. The
+        metrics then also hold 'Pruned' (the reason, '' if the run
+        finished) and 'Bars Evaluated'.
     
     Returns:
     --------
@@ -68,6 +74,8 @@ def run_strategy(
     trade_dates = []
     trade_types = []
     trade_prices = []
+    tracker = pruning.tracker(len(df)) if pruning is not None else None
+    pruned = None
 
     # Main trading loop
     for i in range(2, len(df)):
@@ -149,6 +157,14 @@ def run_strategy(
                 trade_types.append('Sell')
                 trade_prices.append(curr_price)
 
+        # Early abort
+        if tracker is not None and i >= tracker.next_check:
+            pruned = tracker.check(equity, i, len(trade_log))
+            if pruned:
+                df = df.iloc[:i + 1].copy()
+                equity = equity[:i + 1]
+                break
+
     df['Equity'] = equity
 
     # Safety check for empty trade_log
@@ -156,6 +172,9 @@ def run_strategy(
         trade_log = [0]
 
     metrics = calculate_metrics(pd.Series(df['Equity'], index=df.index), trade_log)
+    if pruning is not None:
+        metrics['Pruned'] = pruned or ''
+        metrics['Bars Evaluated'] = len(df)
     trades_df = pd.DataFrame({
         'Date': trade_dates,
         'Type': trade_types,
@@ -0,0 +1,283 @@
+"""
+Multi-Timeframe Module
+======================
+Derives higher-timeframe OHLC bars from one base series.
+
+TimeframeStore keeps the finest bars that were downloaded (e.g. 1h) and
+builds 4h, daily, weekly or monthly bars from them on first request. Each
+derived timeframe is cached, and update() with newly arrived base bars
+re-aggregates only the last (partial) bar of every cached timeframe, so a
+cross-timeframe sweep costs one data load.
+
+Timeframes use yfinance's interval names: "15m", "1h", "4h", "1d", "1wk",
+"1mo". Intraday bars are aligned to UTC clock multiples (4h bars start at
+00:00, 04:00, ... UTC); daily and longer bars follow the calendar of the
+index's timezone.
+
+Yahoo serves 1h bars for about the last 730 days only, so intraday base
+intervals need a recent start date.
+
+Usage:
+    store = TimeframeStore.load("EURUSD=X", "2025-01-01", "2026-01-01", base_interval="1h")
+    for timeframe in ["1h", "4h", "1d"]:
+        metrics, strategy_df, trades_df = run_strategy(store.get(timeframe), alpha=0.05, beta=0.2)
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from strategy.cache import DEFAULT_CACHE_DIR
+from strategy.data import get_price_data
+from strategy.optimization import perform_grid_search
+
+
+# yfinance interval unit -> (pandas unit, approximate length used to order timeframes)
+_UNITS = {
+    'm': ('min', pd.Timedelta(minutes=1)),
+    'h': ('h', pd.Timedelta(hours=1)),
+    'd': ('D', pd.Timedelta(days=1)),
+    'wk': ('W-SUN', pd.Timedelta(days=7)),
+    'mo': ('M', pd.Timedelta(days=28)),
+}
+
+_TIMEFRAME_RE = re.compile(r"^(\d+)(m|h|d|wk|mo)$")
+
+
+def parse_timeframe(timeframe: str) -> Tuple[int, str]:
+    """
+    Splits a timeframe such as "4h" into (4, 'h').
+
+    Also accepts "60m"-style aliases and yfinance's "1wk" / "1mo".
+    """
+    match = _TIMEFRAME_RE.match(timeframe.strip().lower())
+    if match is None:
+        raise ValueError(f"Unknown timeframe '{timeframe}' (expected e.g. '15m', '1h', '4h', '1d', '1wk', '1mo')")
+    n = int(match.group(1))
+    if n <= 0:
+        raise ValueError(f"Timeframe '{timeframe}' must have a positive length")
+    return n, match.group(2)
+
+
+def _length(timeframe: str) -> pd.Timedelta:
+    n, unit = parse_timeframe(timeframe)
+    return n * _UNITS[unit][1]
+
+
+def _relocalize(naive: pd.DatetimeIndex, tz) -> pd.DatetimeIndex:
+    if tz is None:
+        return naive
+    # Midnight can fall in a DST gap in a few zones; move it to the first valid time
+    return naive.tz_localize(tz, ambiguous=np.zeros(len(naive), dtype=bool), nonexistent='shift_forward')
+
+
+def bin_labels(index: pd.DatetimeIndex, timeframe: str) -> pd.DatetimeIndex:
+    """
+    Start time of the `timeframe` bar that each timestamp falls into.
+    """
+    n, unit = parse_timeframe(timeframe)
+    alias = _UNITS[unit][0]
+    tz = index.tz
+
+    if unit in ('m', 'h'):
+        utc = index.tz_convert('UTC') if tz is not None else index
+        labels = utc.floor(f"{n}{alias}")
+        return labels.tz_convert(tz) if tz is not None else labels
+
+    naive = index.tz_localize(None) if tz is not None else index
+    if unit == 'd':
+        return _relocalize(naive.floor(f"{n}D"), tz)
+
+    periods = naive.to_period(alias)
+    if n > 1:
+        ordinals = periods.asi8 - periods.asi8 % n
+        periods = pd.PeriodIndex.from_ordinals(ordinals, freq=alias)
+    return _relocalize(periods.start_time, tz)
+
+
+def _as_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalizes price data to sorted OHLC(V) bars. Close-only data becomes
+    bars with Open = High = Low = Close.
+    """
+    if 'Close' not in df.columns:
+        raise ValueError("Price data needs a 'Close' column")
+    close = df['Close'].astype(float)
+    bars = pd.DataFrame({
+        'Open': df['Open'].astype(float).fillna(close) if 'Open' in df.columns else close,
+        'High': df['High'].astype(float).fillna(close) if 'High' in df.columns else close,
+        'Low': df['Low'].astype(float).fillna(close) if 'Low' in df.columns else close,
+        'Close': close,
+    }, index=df.index)
+    if 'Volume' in df.columns:
+        bars['Volume'] = df['Volume'].astype(float).fillna(0.0)
+    bars = bars[close.notna().to_numpy()]
+    if not bars.index.is_monotonic_increasing:
+        bars = bars.sort_index()
+    return bars
+
+
+def _aggregate(bars: pd.DataFrame, labels: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    One pass over sorted bars: every run of equal labels becomes one bar.
+    """
+    if len(bars) == 0:
+        return bars.iloc[:0].copy()
+
+    keys = labels.asi8
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    out = {
+        'Open': bars['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(bars['High'].to_numpy(), starts),
+        'Low': np.fmin.reduceat(bars['Low'].to_numpy(), starts),
+        'Close': bars['Close'].to_numpy()[ends],
+    }
+    if 'Volume' in bars.columns:
+        out['Volume'] = np.add.reduceat(bars['Volume'].to_numpy(), starts)
+
+    index = labels[starts]
+    index.name = bars.index.name
+    return pd.DataFrame(out, index=index)
+
+
+def resample_ohlc(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregates price data into `timeframe` OHLC bars.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Bars with a 'Close' column and optional 'Open', 'High', 'Low',
+        'Volume' columns, on a DateTimeIndex
+    timeframe : str
+        Target timeframe, e.g. "4h", "1d", "1wk"
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per bar that contains data (no rows for weekends or other
+        gaps), indexed by the bar's start time
+    """
+    bars = _as_bars(df)
+    return _aggregate(bars, bin_labels(bars.index, timeframe))
+
+
+class TimeframeStore:
+    """
+    Base bars plus cached higher-timeframe bars derived from them.
+
+    The last bar of a derived timeframe can be partial (e.g. today's daily
+    bar while the base data is hourly); update() completes it as new base
+    bars arrive.
+
+    Parameters:
+    -----------
+    bars : pd.DataFrame
+        Finest-granularity price data with a 'Close' column (OHLC preferred)
+    base_interval : str
+        Interval of `bars`, e.g. "1h"
+    """
+
+    def __init__(self, bars: pd.DataFrame, base_interval: str = "1h"):
+        parse_timeframe(base_interval)
+        self.base_interval = base_interval
+        self.base = _as_bars(bars)
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def load(
+        cls,
+        ticker: str,
+        start: str,
+        end: str,
+        base_interval: str = "1h",
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR
+    ) -> "TimeframeStore":
+        """
+        Builds a store from one get_price_data call (served from the price
+        cache when it covers the range).
+        """
+        bars = get_price_data(ticker, start, end, interval=base_interval, cache_dir=cache_dir, ohlc=True)
+        return cls(bars, base_interval=base_interval)
+
+    @property
+    def timeframes(self) -> List[str]:
+        """Timeframes derived so far."""
+        return list(self._frames)
+
+    def _key(self, timeframe: str) -> Optional[str]:
+        n, unit = parse_timeframe(timeframe)
+        key = f"{n}{unit}"
+        base_length = _length(self.base_interval)
+        if _length(key) < base_length:
+            raise ValueError(f"Cannot derive {timeframe} bars from {self.base_interval} data")
+        # "60m" on 1h data is the base series itself
+        return None if _length(key) == base_length else key
+
+    def get(self, timeframe: Optional[str] = None) -> pd.DataFrame:
+        """
+        Bars at `timeframe` (the base bars when None or equal to the base
+        interval). The result can be passed directly to run_strategy or
+        perform_grid_search.
+        """
+        key = self._key(timeframe) if timeframe is not None else None
+        if key is None:
+            return self.base
+        if key not in self._frames:
+            self._frames[key] = _aggregate(self.base, bin_labels(self.base.index, key))
+        return self._frames[key]
+
+    def update(self, bars: pd.DataFrame):
+        """
+        Adds newly arrived base bars. Bars with an existing timestamp replace
+        the stored ones.
+
+        Only the bars from the last (or earliest touched) bar of each cached
+        timeframe onwards are re-aggregated.
+        """
+        new = _as_bars(bars)
+        if new.empty:
+            return
+
+        if self.base.empty or new.index[0] > self.base.index[-1]:
+            self.base = pd.concat([self.base, new])
+        else:
+            merged = pd.concat([self.base, new])
+            self.base = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+        for key, frame in self._frames.items():
+            restart = bin_labels(new.index[:1], key)[0]
+            if not frame.empty:
+                restart = min(restart, frame.index[-1])
+            tail = self.base.iloc[self.base.index.searchsorted(restart):]
+            head = frame.iloc[:frame.index.searchsorted(restart)]
+            self._frames[key] = pd.concat([head, _aggregate(tail, bin_labels(tail.index, key))])
+
+
+def sweep_timeframes(
+    store: TimeframeStore,
+    timeframes: List[str],
+    threshold: float,
+    decel_rate: float,
+    step: float = 0.05,
+    macro_df: Optional[pd.DataFrame] = None
+) -> Dict[str, Tuple[pd.DataFrame, Dict[str, float]]]:
+    """
+    Runs perform_grid_search on each timeframe of one store.
+
+    Returns:
+    --------
+    Dict[str, Tuple[pd.DataFrame, Dict]]
+        {timeframe: (heatmap_data, best_params)}
+    """
+    results = {}
+    for timeframe in timeframes:
+        print(f"Timeframe {timeframe}:")
+        results[timeframe] = perform_grid_search(
+            store.get(timeframe), threshold, decel_rate, step=step, macro_df=macro_df
+        )
+    return results
@@ -2,11 +2,15 @@
 Visualization Module
 ====================
 Functions for plotting strategy results.
+
+matplotlib and seaborn are imported when a plot is drawn, not when the
+module is imported.
 """
 
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+from typing import Optional
+
+from strategy.rolling import rolling_metrics
 
 
 def plot_heatmap(heatmap_data: pd.DataFrame, show_plot: bool = True):
@@ -16,12 +20,22 @@ def plot_heatmap(heatmap_data: pd.DataFrame, show_plot: bool = True):
     Parameters:
     -----------
     heatmap_data : pd.DataFrame
-        Pivoted DataFrame with alpha as index, beta as columns, Sharpe as values
+        Pivoted DataFrame with alpha as index, beta as columns, Sharpe as values.
+        Cells pruned by a PruningPolicy (heatmap_data.attrs['pruned']) are
+        marked with an 'x'.
     show_plot : bool
         Whether to show the plot (default: True). Set to False for Streamlit.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.figure(figsize=(10, 8))
-    sns.heatmap(heatmap_data, annot=True, fmt=".2f", cmap="RdYlGn", center=0)
+    ax = sns.heatmap(heatmap_data, annot=True, fmt=".2f", cmap="RdYlGn", center=0)
+    pruned = heatmap_data.attrs.get('pruned')
+    if pruned is not None:
+        is_pruned = pruned.reindex(index=heatmap_data.index, columns=heatmap_data.columns).fillna('') != ''
+        for row, col in zip(*is_pruned.to_numpy().nonzero()):
+            ax.text(col + 0.5, row + 0.5, "x", ha="center", va="center", color="grey")
     plt.title("Strategy Sharpe Ratio Heatmap")
     plt.ylabel("Alpha (Slow)")
     plt.xlabel("Beta (Fast)")
@@ -32,7 +46,13 @@ def plot_heatmap(heatmap_data: pd.DataFrame, show_plot: bool = True):
     return plt.gcf()
 
 
-def plot_trades(df: pd.DataFrame, trades_df: pd.DataFrame, show_plot: bool = True):
+def plot_trades(
+    df: pd.DataFrame,
+    trades_df: pd.DataFrame,
+    show_plot: bool = True,
+    rolling_window: Optional[int] = None,
+    periods_per_year: int = 252
+):
     """
     Plot price, indicators, trades, and equity curve.
     
@@ -44,8 +64,20 @@ def plot_trades(df: pd.DataFrame, trades_df: pd.DataFrame, show_plot: bool = Tru
         DataFrame with trade log (Date, Type, Price columns)
     show_plot : bool
         Whether to show the plot (default: True). Set to False for Streamlit.
+    rolling_window : int, optional
+        If given, add a panel with rolling Sharpe and rolling max drawdown
+        over this many bars
+    periods_per_year : int
+        Bars per year used to annualize the rolling Sharpe
     """
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), gridspec_kw={'height_ratios': [2, 1]})
+    import matplotlib.pyplot as plt
+
+    if rolling_window:
+        fig, (ax1, ax2, ax3) = plt.subplots(
+            3, 1, figsize=(14, 13), sharex=True, gridspec_kw={'height_ratios': [2, 1, 1]}
+        )
+    else:
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), gridspec_kw={'height_ratios': [2, 1]})
 
     # Plot 1: Price and Signals
     ax1.plot(df.index, df['Close'], label='Price', color='black', alpha=0.3)
@@ -72,6 +104,24 @@ def plot_trades(df: pd.DataFrame, trades_df: pd.DataFrame, show_plot: bool = Tru
     ax2.grid(True, alpha=0.3)
     ax2.legend()
 
+    # Plot 3: Rolling Sharpe and Max Drawdown
+    if rolling_window:
+        rolling = rolling_metrics(df['Equity'], rolling_window, periods_per_year)
+        ax3.plot(df.index, rolling['Rolling Sharpe'], color='teal', label='Rolling Sharpe')
+        ax3.axhline(0, color='black', linewidth=0.8)
+        ax3.set_ylabel("Sharpe Ratio")
+        ax3.set_title(f"Rolling Metrics ({rolling_window} bars)")
+        ax3.grid(True, alpha=0.3)
+
+        ax3b = ax3.twinx()
+        ax3b.fill_between(df.index, rolling['Rolling Max Drawdown'], 0, color='red', alpha=0.2,
+                          label='Rolling Max Drawdown')
+        ax3b.set_ylabel("Max Drawdown")
+
+        lines, labels = ax3.get_legend_handles_labels()
+        lines_b, labels_b = ax3b.get_legend_handles_labels()
+        ax3.legend(lines + lines_b, labels + labels_b, loc='upper left')
+
     plt.tight_layout()
     if show_plot:
         plt.show()